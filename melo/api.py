@@ -1,6 +1,10 @@
 import os
 import re
+import copy
+import contextlib
 import json
+import queue
+import threading
 import torch
 import librosa
 import soundfile
@@ -14,6 +18,8 @@ from . import utils
 from . import commons
 from .models import SynthesizerTrn
 from .split_utils import split_sentence
+from .text.cleaner import preload
+from .quantize import quantize_int8, bf16_supported
 from .mel_processing import spectrogram_torch, spectrogram_torch_conv
 from .download_utils import load_or_download_config, load_or_download_model
 
@@ -27,59 +33,227 @@ def extract_and_replace(text, pattern = re.compile(r"(<<[^<>]+>>)|(\[\[[^\[\]]+\
     result = pattern.sub(replacer, text)
     return tags, result
 
+# padded input sizes for the compiled path: phones, latent frames, batch
+PHONE_BUCKETS = (32, 64, 128, 256)
+FRAME_BUCKETS = (128, 256, 512, 1024, 2048)
+BATCH_BUCKETS = (1, 2, 4, 8)
+
+
+def _raise_recompile_limit(n):
+    # dynamo keeps 8 graphs per function by default and silently runs the
+    # rest eager; every bucket combination needs its own graph
+    config = torch._dynamo.config
+    name = 'recompile_limit' if hasattr(config, 'recompile_limit') else 'cache_size_limit'
+    if getattr(config, name) < n:
+        setattr(config, name, n)
+
+
+def _compile_forward(module):
+    compiled = torch.compile(module.forward, dynamic=False)
+    # Generator.stream decodes windows of varying length, it keeps using this
+    module.eager_forward = module.forward
+
+    def forward(*args, g=None, **kwargs):
+        # a plain view of g: the projections cached on it stay out of the graph
+        return compiled(*args, g=None if g is None else g.detach(), **kwargs)
+    return forward
+
 class TTS(nn.Module):
     def __init__(self, 
                 language,
                 device='auto',
                 use_hf=True,
                 config_path=None,
-                ckpt_path=None):
+                ckpt_path=None,
+                quantize=None,
+                precision='fp32',
+                compile=False,
+                backend='torch',
+                onnx_dir=None):
         super().__init__()
         if device == 'auto':
             device = 'cpu'
-            if torch.cuda.is_available(): device = 'cuda'
-            if torch.backends.mps.is_available(): device = 'mps'
+            if backend == 'torch':
+                if torch.cuda.is_available(): device = 'cuda'
+                if torch.backends.mps.is_available(): device = 'mps'
         if 'cuda' in device:
             assert torch.cuda.is_available()
+        if quantize not in [None, 'int8']:
+            raise ValueError(f'Unsupported quantize={quantize!r}, expected None or "int8"')
+        if quantize and device != 'cpu':
+            raise ValueError('int8 quantization is only supported on cpu')
+        if precision not in ['fp32', 'bf16']:
+            raise ValueError(f'Unsupported precision={precision!r}, expected "fp32" or "bf16"')
+        if backend not in ['torch', 'onnx']:
+            raise ValueError(f'Unsupported backend={backend!r}, expected "torch" or "onnx"')
+        if backend == 'onnx' and (device != 'cpu' or quantize or precision != 'fp32' or compile):
+            raise ValueError('the onnx backend runs on cpu in fp32, without quantize or compile')
+        if precision == 'bf16' and not bf16_supported(device):
+            print(f" > bf16 is not supported on {device}, running in fp32")
+            precision = 'fp32'
 
         # config_path = 
         hps = load_or_download_config(language, use_hf=use_hf, config_path=config_path)
 
-        num_languages = hps.num_languages
-        num_tones = hps.num_tones
         symbols = hps.symbols
 
-        model = SynthesizerTrn(
-            len(symbols),
-            hps.data.filter_length // 2 + 1,
-            hps.train.segment_size // hps.data.hop_length,
-            n_speakers=hps.data.n_speakers,
-            num_tones=num_tones,
-            num_languages=num_languages,
-            **hps.model,
-        ).to(device)
-
-        model.eval()
+        if backend == 'onnx':
+            from .onnx_export import OnnxSynthesizer, export_onnx
+            if onnx_dir is None:
+                raise ValueError('the onnx backend needs onnx_dir')
+            if not OnnxSynthesizer.exists(onnx_dir):
+                export_onnx(self.load_model(hps, language, 'cpu', use_hf, ckpt_path), onnx_dir)
+            model = OnnxSynthesizer(onnx_dir)
+        else:
+            model = self.load_model(hps, language, device, use_hf, ckpt_path)
+            if quantize == 'int8':
+                quantize_int8(model)
         self.model = model
+        self.backend = backend
         self.symbol_to_id = {s: i for i, s in enumerate(symbols)}
         self.hps = hps
         self.device = device
-    
-        # load state_dict
-        checkpoint_dict = load_or_download_model(language, device, use_hf=use_hf, ckpt_path=ckpt_path)
-        self.model.load_state_dict(checkpoint_dict['model'], strict=True)
+        self.precision = precision
+        self.phone_buckets = None
+        self.batch_buckets = None
+        self.frame_buckets = None
+        # speaker_id -> g carrying its precomputed projections
+        self.speaker_cache = {}
+        for speaker_id in hps.data.spk2id.values():
+            self.speaker_conditioning(speaker_id)
         
         language = language.split('_')[0]
         self.language = 'ZH_MIX_EN' if language == 'ZH' else language # we support a ZH_MIX_EN model
+        # only this model's language front-end gets imported
+        preload([self.language])
+        if compile:
+            self.compile_for_inference()
 
     @staticmethod
-    def audio_numpy_concat(segment_data_list, sr, speed=1., end_pause=0.05):
-        audio_segments = []
+    def load_model(hps, language, device, use_hf=True, ckpt_path=None):
+        # load state_dict
+        checkpoint_dict = load_or_download_model(language, device, use_hf=use_hf, ckpt_path=ckpt_path)
+        state_dict = checkpoint_dict.pop('model')
+        del checkpoint_dict
+
+        # exported checkpoints may lack one duration predictor or weight norm
+        sdp_ratio = None
+        if not any(k.startswith('sdp.') for k in state_dict):
+            sdp_ratio = 0
+        elif not any(k.startswith('dp.') for k in state_dict):
+            sdp_ratio = 1
+        weight_norm = any(k.endswith('.weight_g') for k in state_dict)
+
+        # build on the meta device and assign the (mmapped) checkpoint tensors
+        # directly, instead of initializing weights only to overwrite them
+        with torch.device('meta'):
+            model = SynthesizerTrn.for_inference(hps, sdp_ratio=sdp_ratio, weight_norm=weight_norm)
+        model.load_state_dict(state_dict, strict=True, assign=True)
+        del state_dict
+
+        model.to(device)
+        model.eval()
+        return model
+
+    def optimize_for_inference(self):
+        """Opt-in: remove weight norm everywhere and fold constant scalings
+        into the weights. Outputs stay the same up to float rounding."""
+        if self.backend != 'torch':
+            raise ValueError('optimize_for_inference needs the torch backend, export_onnx already optimizes')
+        self.model.optimize_for_inference()
+        self.speaker_cache.clear()
+        return self
+
+    def compile_for_inference(self, warmup=True, batch_sizes=BATCH_BUCKETS):
+        """torch.compile the text encoder, flow and vocoder with static shapes.
+
+        From here on inputs are padded to PHONE_BUCKETS / FRAME_BUCKETS and
+        infer_batch batches to `batch_sizes`, so each bucket compiles once;
+        warmup compiles all of them now instead of on the first requests.
+        The streamed vocoder of tts_iter(chunk_frames=...) stays eager.
+        """
+        if self.backend != 'torch':
+            raise ValueError('compile_for_inference needs the torch backend')
+        model = self.model
+        self.phone_buckets = PHONE_BUCKETS
+        self.frame_buckets = FRAME_BUCKETS
+        self.batch_buckets = tuple(batch_sizes)
+        # twice the shapes: mixed-speaker batches pass a batch-sized g
+        n = len(self.batch_buckets) * max(len(self.phone_buckets), len(self.frame_buckets))
+        _raise_recompile_limit(2 * n)
+        for module in [model.enc_p, model.flow, model.dec]:
+            module.forward = _compile_forward(module)
+        if warmup:
+            self.warmup()
+        return self
+
+    def warmup(self):
+        model = self.model
+        device = self.device
+        hps = self.hps
+        speaker_ids = list(hps.data.spk2id.values())
+        g = self.speaker_conditioning(speaker_ids[0]) if speaker_ids and getattr(model, 'emb_g', None) is not None else None
+        g_p = None if model.use_vc else g
+        with torch.no_grad(), self.autocast():
+            for b in self.batch_buckets:
+                for n in self.phone_buckets:
+                    x = torch.zeros(b, n, dtype=torch.long, device=device)
+                    model.enc_p(x, torch.LongTensor([n] * b).to(device), x, x,
+                                torch.zeros(b, 1024, n, device=device), torch.zeros(b, 768, n, device=device), g=g_p)
+                for n in self.frame_buckets:
+                    z = torch.zeros(b, hps.model.inter_channels, n, device=device)
+                    z = model.flow(z, torch.ones(b, 1, n, device=device), g=g, reverse=True)
+                    model.dec(z, g=g)
+
+    def speaker_conditioning(self, speaker_id):
+        """Cached SynthesizerTrn.speaker_conditioning for speaker_id, or None
+        where it does not apply (onnx backend)."""
+        if not hasattr(self.model, 'speaker_conditioning'):
+            return None
+        if speaker_id not in self.speaker_cache:
+            with torch.no_grad():
+                self.speaker_cache[speaker_id] = self.model.speaker_conditioning(speaker_id)
+        return self.speaker_cache[speaker_id]
+
+    def autocast(self):
+        """Context for model calls: bf16 autocast if precision='bf16'."""
+        if self.precision == 'bf16':
+            return torch.autocast(torch.device(self.device).type, dtype=torch.bfloat16)
+        return contextlib.nullcontext()
+
+    @staticmethod
+    def audio_numpy_concat_length(segment_data_list, sr, speed=1., end_pause=0.05):
+        """Number of samples audio_numpy_concat produces for these segments."""
+        pause = int((sr * end_pause) / speed)
+        return sum(segment_data.size + pause for segment_data in segment_data_list)
+
+    @staticmethod
+    def audio_numpy_concat(segment_data_list, sr, speed=1., end_pause=0.05, out=None):
+        """Concatenate the segments, each followed by end_pause seconds of
+        silence, into one float32 array.
+
+        With `out` (a float32 array, or any writable buffer such as a
+        memoryview or bytearray holding float32 samples) the audio is
+        written there instead of into a new array; it must hold at least
+        audio_numpy_concat_length samples. Returns the filled array.
+        """
+        pause = int((sr * end_pause) / speed)
+        total = TTS.audio_numpy_concat_length(segment_data_list, sr, speed=speed, end_pause=end_pause)
+        if out is None:
+            audio = np.empty(total, dtype=np.float32)
+        else:
+            if not isinstance(out, np.ndarray):
+                out = np.frombuffer(out, dtype=np.float32)
+            if out.size < total:
+                raise ValueError(f'out holds {out.size} samples, {total} needed')
+            audio = out[:total]
+        pos = 0
         for segment_data in segment_data_list:
-            audio_segments += segment_data.reshape(-1).tolist()
-            audio_segments += [0] * int((sr * end_pause) / speed)
-        audio_segments = np.array(audio_segments).astype(np.float32)
-        return audio_segments
+            n = segment_data.size
+            audio[pos:pos + n] = segment_data.reshape(-1)
+            audio[pos + n:pos + n + pause] = 0
+            pos += n + pause
+        return audio
 
     @staticmethod
     def split_sentences_into_pieces(text, language, quiet=False):
@@ -90,62 +264,173 @@ class TTS(nn.Module):
             print(" > ===========================")
         return texts
 
-    def tts_to_file(self, text, speaker_id, output_path=None, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0, pbar=None, format=None, position=None, quiet=False,):
+    def text_to_features(self, text):
+        return self.texts_to_features([text])[0]
+
+    def texts_to_features(self, texts):
+        language = self.language
+        if language in ['EN', 'ZH_MIX_EN']:
+            texts = [re.sub(r'([a-z])([A-Z])', r'\1 \2', t) for t in texts]
+        return utils.get_text_for_tts_infer_batch(texts, language, self.hps, self.device, self.symbol_to_id)
+
+    def infer_batch(self, features, speaker_id, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0):
+        """Run one padded forward pass over several sentences.
+
+        features is a list of text_to_features outputs, speaker_id either one
+        id for the whole batch or one id per item. Returns one waveform per
+        item, trimmed to its own length.
+        """
+        device = self.device
+        hop = self.hps.data.hop_length
+        if not isinstance(speaker_id, (list, tuple)):
+            speaker_id = [speaker_id] * len(features)
+        n = len(features)
+        if self.batch_buckets:
+            # pad the batch with copies of the first item, see compile_for_inference
+            pad = commons.bucket_length(n, self.batch_buckets) - n
+            features = list(features) + [features[0]] * pad
+            speaker_id = list(speaker_id) + [speaker_id[0]] * pad
+        with torch.no_grad(), self.autocast():
+            x_tst, x_tst_lengths, tones, lang_ids, bert, ja_bert = utils.collate_text_for_tts_infer(features, device, self.phone_buckets)
+            speakers = torch.LongTensor(speaker_id).to(device)
+            g = self.speaker_conditioning(speaker_id[0]) if len(set(speaker_id)) == 1 else None
+            o, attn, y_mask, _ = self.model.infer(
+                    x_tst,
+                    x_tst_lengths,
+                    speakers,
+                    tones,
+                    lang_ids,
+                    bert,
+                    ja_bert,
+                    sdp_ratio=sdp_ratio,
+                    noise_scale=noise_scale,
+                    noise_scale_w=noise_scale_w,
+                    length_scale=1. / speed,
+                    frame_buckets=self.frame_buckets,
+                    g=g,
+                )
+            y_lengths = (y_mask.sum(dim=(1, 2)).long() * hop).tolist()
+            o = o[:, 0].data.cpu().float().numpy()
+            del x_tst, tones, lang_ids, bert, ja_bert, x_tst_lengths, speakers, attn, y_mask
+        return [o[i, :y_lengths[i]] for i in range(n)]
+
+    def tts_to_file(self, text, speaker_id, output_path=None, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0, pbar=None, format=None, position=None, quiet=False, batch_size=1, stream=False):
+        """Synthesize text and write it to output_path, or return it.
+
+        With stream=True (and an output_path) the file is opened up front
+        and every batch of sentences is appended as soon as it is
+        synthesized, so memory stays flat for book-length texts. format is
+        inferred from the extension (WAV, FLAC, OGG, ...) unless given.
+        """
         language = self.language
+        sr = self.hps.data.sampling_rate
         texts = self.split_sentences_into_pieces(text, language, quiet)
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
         audio_list = []
         if pbar:
-            tx = pbar(texts)
+            tx = pbar(batches)
         else:
             if position:
-                tx = tqdm(texts, position=position)
+                tx = tqdm(batches, position=position)
             elif quiet:
-                tx = texts
+                tx = batches
             else:
-                tx = tqdm(texts)
-        for t in tx:
-            if language in ['EN', 'ZH_MIX_EN']:
-                t = re.sub(r'([a-z])([A-Z])', r'\1 \2', t)
-            device = self.device
-            bert, ja_bert, phones, tones, lang_ids = utils.get_text_for_tts_infer(t, language, self.hps, device, self.symbol_to_id)
-            with torch.no_grad():
-                x_tst = phones.to(device).unsqueeze(0)
-                tones = tones.to(device).unsqueeze(0)
-                lang_ids = lang_ids.to(device).unsqueeze(0)
-                bert = bert.to(device).unsqueeze(0)
-                ja_bert = ja_bert.to(device).unsqueeze(0)
-                x_tst_lengths = torch.LongTensor([phones.size(0)]).to(device)
-                del phones
-                speakers = torch.LongTensor([speaker_id]).to(device)
-                audio = self.model.infer(
-                        x_tst,
-                        x_tst_lengths,
-                        speakers,
-                        tones,
-                        lang_ids,
-                        bert,
-                        ja_bert,
-                        sdp_ratio=sdp_ratio,
-                        noise_scale=noise_scale,
-                        noise_scale_w=noise_scale_w,
-                        length_scale=1. / speed,
-                    )[0][0, 0].data.cpu().float().numpy()
-                del x_tst, tones, lang_ids, bert, ja_bert, x_tst_lengths, speakers
-                # 
-            audio_list.append(audio)
+                tx = tqdm(batches)
+        writer = None
+        if stream and output_path is not None:
+            writer = soundfile.SoundFile(output_path, 'w', samplerate=sr, channels=1, format=format)
+        try:
+            for batch in tx:
+                features = self.texts_to_features(batch)
+                audios = self.infer_batch(
+                    features,
+                    speaker_id,
+                    sdp_ratio=sdp_ratio,
+                    noise_scale=noise_scale,
+                    noise_scale_w=noise_scale_w,
+                    speed=speed,
+                )
+                del features
+                if writer is not None:
+                    writer.write(self.audio_numpy_concat(audios, sr=sr, speed=speed))
+                else:
+                    audio_list += audios
+        finally:
+            if writer is not None:
+                writer.close()
         torch.cuda.empty_cache()
-        audio = self.audio_numpy_concat(audio_list, sr=self.hps.data.sampling_rate, speed=speed)
+        if writer is not None:
+            return
+        audio = self.audio_numpy_concat(audio_list, sr=sr, speed=speed)
 
         if output_path is None:
             return audio
         else:
             if format:
-                soundfile.write(output_path, audio, self.hps.data.sampling_rate, format=format)
+                soundfile.write(output_path, audio, sr, format=format)
             else:
-                soundfile.write(output_path, audio, self.hps.data.sampling_rate)
+                soundfile.write(output_path, audio, sr)
+
 
+    def _frontend_iter(self, texts, lookahead=2):
+        """Yield (features, phoneme_list) per sentence, running the text
+        front-end up to `lookahead` sentences ahead in a worker thread."""
+        if self.language in ['EN', 'ZH_MIX_EN']:
+            from .text.english import get_phoneme_list
+        else:
+            get_phoneme_list = lambda: [None]
+
+        def frontend(t):
+            features = self.text_to_features(t)
+            # g2p refills a module-level list, snapshot it before the next sentence
+            return features, copy.deepcopy(get_phoneme_list())
+
+        if lookahead <= 0:
+            for t in texts:
+                yield frontend(t)
+            return
+
+        q = queue.Queue(maxsize=lookahead)
+        stop = threading.Event()
+        done = object()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
 
-    def tts_iter(self, text, speaker_id, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0, pbar=None, format=None, position=None, quiet=False,):
+        def worker():
+            # the sentinel always goes out, so the consumer never blocks on
+            # a dead worker; errors (BaseException too) are re-raised there
+            try:
+                for t in texts:
+                    if not put(frontend(t)):
+                        return
+            except BaseException as e:
+                put(e)
+            finally:
+                put(done)
+
+        thread = threading.Thread(target=worker, name='melo-frontend', daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = q.get()
+                if item is done:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+
+    def tts_iter(self, text, speaker_id, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0, pbar=None, format=None, position=None, quiet=False, lookahead=2, chunk_frames=None):
+        if chunk_frames and self.backend != 'torch':
+            raise ValueError('streaming the vocoder (chunk_frames) needs the torch backend')
         language = self.language
         print("TEXT1", repr(text))
         tags, result = extract_and_replace(text)
@@ -169,43 +454,45 @@ class TTS(nn.Module):
         hop = self.hps.data.hop_length
         sr = self.hps.data.sampling_rate
         frame_ms = hop * 1000.0 / sr
-        for t in tx:
-            if language in ['EN', 'ZH_MIX_EN']:
-                t = re.sub(r'([a-z])([A-Z])', r'\1 \2', t)
-                pass
+        for features, pl in self._frontend_iter(tx, lookahead):
             device = self.device
-            print("T", repr(t))
-            bert, ja_bert, phones, tones, lang_ids = utils.get_text_for_tts_infer(t, language, self.hps, device, self.symbol_to_id)
             with torch.no_grad():  
-                x_tst = phones.to(device).unsqueeze(0)
-                tones = tones.to(device).unsqueeze(0)
-                lang_ids = lang_ids.to(device).unsqueeze(0)
-                bert = bert.to(device).unsqueeze(0)
-                ja_bert = ja_bert.to(device).unsqueeze(0)
-                x_tst_lengths = torch.LongTensor([phones.size(0)]).to(device)
-                del phones
+                n_phones = features[2].size(0)
+                x_tst, x_tst_lengths, tones, lang_ids, bert, ja_bert = utils.collate_text_for_tts_infer([features], device, self.phone_buckets)
+                del features
                 speakers = torch.LongTensor([speaker_id]).to(device)
-                aud, attn, _, _ = self.model.infer(
-                    x_tst,
-                    x_tst_lengths,
-                    speakers,
-                    tones,
-                    lang_ids,
-                    bert,
-                    ja_bert,
-                    sdp_ratio=sdp_ratio,
-                    noise_scale=noise_scale,
-                    noise_scale_w=noise_scale_w,
-                    length_scale=1. / speed,
-                )
-                dur = attn.sum(dim=2)[0, 0].long()                
+                # with chunk_frames set, stop before the vocoder and stream it below
+                infer = self.model.infer_latent if chunk_frames else self.model.infer
+                with self.autocast():
+                    outputs = infer(
+                        x_tst,
+                        x_tst_lengths,
+                        speakers,
+                        tones,
+                        lang_ids,
+                        bert,
+                        ja_bert,
+                        sdp_ratio=sdp_ratio,
+                        noise_scale=noise_scale,
+                        noise_scale_w=noise_scale_w,
+                        length_scale=1. / speed,
+                        frame_buckets=self.frame_buckets,
+                        g=self.speaker_conditioning(speaker_id),
+                        # per-phoneme timings come from the alignment
+                        return_attn=True,
+                    )
+                if chunk_frames:
+                    z, g, attn, y_mask, _ = outputs
+                else:
+                    aud, attn, y_mask, _ = outputs
+                # both axes may be padded up to a bucket
+                y_len = int(y_mask.sum()) * hop
+                dur = attn.sum(dim=2)[0, 0, :n_phones].long()                
                 # start_frames[j] = sum_{k < j} dur[k]
                 start_frames = torch.cat([
                     torch.zeros(1, device=dur.device, dtype=dur.dtype),
                     torch.cumsum(dur[:-1], dim=0)
                 ])
-                from .text.english import get_phoneme_list
-                pl = get_phoneme_list()
                 for i, info in enumerate(pl):
                     slot_j = 2 * i + 1
                     if slot_j >= dur.numel():
@@ -217,9 +504,6 @@ class TTS(nn.Module):
                         pass
                     pass
                 end_of_utterance_slots = (dur[-1] * hop).item()
-                audio = aud[0, 0].data.cpu().float().numpy().astype(np.float32)
-                audio2 = audio[:-end_of_utterance_slots]
-                audio3 = self.audio_numpy_concat([audio2], sr=sr, speed=speed, end_pause=0)
                 #from pprint import pprint
                 #print("PL1")
                 #pprint(pl)               
@@ -240,7 +524,26 @@ class TTS(nn.Module):
                 pl2 = [alter(x) for x in pl if x]
                 #print("PL2")
                 #pprint(pl2)
-                yield audio3, pl2
+                if chunk_frames:
+                    # timings go out with the first chunk of each sentence
+                    remaining = y_len - end_of_utterance_slots
+                    chunks = self.model.dec.stream(z, g=g, chunk_frames=chunk_frames)
+                    while remaining > 0:
+                        # autocast only around the vocoder, not across the yield
+                        with self.autocast():
+                            chunk = next(chunks, None)
+                        if chunk is None:
+                            break
+                        audio = chunk[0, 0, :remaining].data.cpu().float().numpy()
+                        remaining -= audio.shape[0]
+                        yield audio, pl2
+                        pl2 = []
+                    del z, g
+                else:
+                    audio = aud[0, 0, :y_len].data.cpu().float().numpy().astype(np.float32)
+                    audio2 = audio[:-end_of_utterance_slots]
+                    audio3 = self.audio_numpy_concat([audio2], sr=sr, speed=speed, end_pause=0)
+                    yield audio3, pl2
 
                 del x_tst, tones, lang_ids, bert, ja_bert, x_tst_lengths, speakers
                 #
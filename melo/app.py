@@ -2,9 +2,11 @@
 # Demo also available on HF Spaces: https://huggingface.co/spaces/mrfakename/MeloTTS
 import gradio as gr
 import os, torch, io
+import soundfile
 # os.system('python -m unidic download')
 print("Make sure you've downloaded unidic (python -m unidic download) for this WebUI to work.")
 from melo.api import TTS
+from melo.scheduler import BatchScheduler
 speed = 1.0
 import tempfile
 import click
@@ -17,6 +19,8 @@ models = {
     'JP': TTS(language='JP', device=device),
     'KR': TTS(language='KR', device=device),
 }
+# concurrent requests to the same model are batched together
+schedulers = {language: BatchScheduler(model) for language, model in models.items()}
 speaker_ids = models['EN'].hps.data.spk2id
 
 default_text_dict = {
@@ -30,7 +34,10 @@ default_text_dict = {
     
 def synthesize(speaker, text, speed, language, progress=gr.Progress()):
     bio = io.BytesIO()
-    models[language].tts_to_file(text, models[language].hps.data.spk2id[speaker], bio, speed=speed, pbar=progress.tqdm, format='wav')
+    hps = models[language].hps
+    audio = schedulers[language].synthesize(text, hps.data.spk2id[speaker], speed=speed,
+                                            progress=lambda done, total: progress((done, total), unit='sentences'))
+    soundfile.write(bio, audio, hps.data.sampling_rate, format='wav')
     return bio.getvalue()
 def load_speakers(language, text):
     if text in list(default_text_dict.values()):
@@ -48,7 +55,9 @@ with gr.Blocks() as demo:
         language.input(load_speakers, inputs=[language, text], outputs=[speaker, text])
     btn = gr.Button('Synthesize', variant='primary')
     aud = gr.Audio(interactive=False)
-    btn.click(synthesize, inputs=[speaker, text, speed, language], outputs=[aud])
+    # let up to a full batch of requests reach the scheduler at once
+    btn.click(synthesize, inputs=[speaker, text, speed, language], outputs=[aud],
+              concurrency_limit=max(s.max_batch_size for s in schedulers.values()))
     gr.Markdown('WebUI by [mrfakename](https://twitter.com/realmrfakename).')
 @click.command()
 @click.option('--share', '-s', is_flag=True, show_default=True, default=False, help="Expose a publicly-accessible shared Gradio link usable by anyone with the link. Only share the link with people you trust.")
@@ -100,8 +100,9 @@ class Encoder(nn.Module):
         x = x * x_mask
         for i in range(self.n_layers):
             if i == self.cond_layer_idx and g is not None:
-                g = self.spk_emb_linear(g.transpose(1, 2))
-                g = g.transpose(1, 2)
+                g = commons.speaker_projection(
+                    self.spk_emb_linear, g, lambda g: self.spk_emb_linear(g.transpose(1, 2)).transpose(1, 2)
+                )
                 x = x + g
                 x = x * x_mask
             y = self.attn_layers[i](x, x, attn_mask)
@@ -227,6 +228,8 @@ class MultiHeadAttention(nn.Module):
         self.proximal_bias = proximal_bias
         self.proximal_init = proximal_init
         self.attn = None
+        # use _attention_fast at inference, see attention()
+        self.fast_path = True
 
         self.k_channels = channels // n_heads
         self.conv_q = nn.Conv1d(channels, channels, 1)
@@ -266,6 +269,8 @@ class MultiHeadAttention(nn.Module):
         return x
 
     def attention(self, query, key, value, mask=None):
+        if self.fast_path and not self.training and self.block_length is None:
+            return self._attention_fast(query, key, value, mask=mask)
         # reshape [b, d, t] -> [b, n_h, t, d_k]
         b, d, t_s, t_t = (*key.size(), query.size(2))
         query = query.view(b, self.n_heads, self.k_channels, t_t).transpose(2, 3)
@@ -316,6 +321,71 @@ class MultiHeadAttention(nn.Module):
         )  # [b, n_h, t_t, d_k] -> [b, d, t_t]
         return output, p_attn
 
+    def _attention_fast(self, query, key, value, mask=None):
+        """Inference version of attention().
+
+        The relative-key logits, proximal bias and mask are summed into one
+        additive bias. Relative logits are computed over the 2w+1 window
+        only and gathered into place, and the relative-value term gathers
+        the same band out of p_attn, instead of the pad/reshape round trips
+        through [b, h, t, 2t-1] tensors. Layers without relative attention
+        run in F.scaled_dot_product_attention and return no p_attn.
+        Fully masked (padding) rows differ from attention(), valid ones
+        match up to float rounding.
+        """
+        b, d, t_s, t_t = (*key.size(), query.size(2))
+        query = query.view(b, self.n_heads, self.k_channels, t_t).transpose(2, 3)
+        key = key.view(b, self.n_heads, self.k_channels, t_s).transpose(2, 3)
+        value = value.view(b, self.n_heads, self.k_channels, t_s).transpose(2, 3)
+
+        bias = None
+        if self.window_size is not None:
+            assert t_s == t_t, "Relative attention is only available for self-attention."
+            rel_logits = self._matmul_with_relative_keys(
+                query / math.sqrt(self.k_channels), self.emb_rel_k
+            )  # [b, h, t, 2w+1]
+            index, valid = self._relative_band(t_s, query.device, absolute=True)
+            bias = rel_logits.gather(-1, index.expand(b, self.n_heads, t_t, t_s)) * valid
+        if self.proximal_bias:
+            assert t_s == t_t, "Proximal bias is only available for self-attention."
+            proximal = self._attention_bias_proximal(t_s).to(device=query.device, dtype=query.dtype)
+            bias = proximal if bias is None else bias + proximal
+        if mask is not None:
+            masked = (mask == 0).to(query.dtype) * -1e4
+            bias = masked if bias is None else bias + masked
+
+        if self.window_size is None:
+            output = F.scaled_dot_product_attention(query, key, value, attn_mask=bias)
+            p_attn = None
+        else:
+            scores = torch.matmul(query / math.sqrt(self.k_channels), key.transpose(-2, -1))
+            p_attn = F.softmax(scores + bias, dim=-1)  # [b, n_h, t_t, t_s]
+            output = torch.matmul(p_attn, value)
+            index, valid = self._relative_band(t_s, query.device, absolute=False)
+            relative_weights = p_attn.gather(-1, index.expand(b, self.n_heads, t_t, index.size(-1))) * valid
+            output = output + self._matmul_with_relative_values(relative_weights, self.emb_rel_v)
+        output = output.transpose(2, 3).contiguous().view(b, d, t_t)
+        return output, p_attn
+
+    def _relative_band(self, length, device, absolute):
+        """Gather indices between the [l, l] score matrix and the [l, 2w+1]
+        relative window, with a mask of the valid entries.
+
+        absolute=True indexes the window for every (i, j), j - i + w;
+        absolute=False indexes the scores for every (i, r), i + r - w.
+        """
+        w = self.window_size
+        pos = torch.arange(length, device=device).unsqueeze(1)
+        if absolute:
+            index = torch.arange(length, device=device).unsqueeze(0) - pos + w
+            valid = (index >= 0) & (index <= 2 * w)
+            index = index.clamp(0, 2 * w)
+        else:
+            index = pos + torch.arange(2 * w + 1, device=device).unsqueeze(0) - w
+            valid = (index >= 0) & (index < length)
+            index = index.clamp(0, length - 1)
+        return index, valid
+
     def _matmul_with_relative_values(self, x, y):
         """
         x: [b, h, l, m]
@@ -0,0 +1,154 @@
+import os
+import csv
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+import soundfile
+from tqdm import tqdm
+
+
+def load_manifest(path):
+    """Read a .jsonl or .csv manifest into a list of dicts with text,
+    speaker, speed and output_path (`output` is accepted too)."""
+    with open(path, newline='') as f:
+        if path.endswith('.csv'):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    items = []
+    for i, row in enumerate(rows):
+        output_path = row.get('output_path') or row.get('output')
+        if not row.get('text') or not output_path:
+            raise ValueError(f'{path}: entry {i} needs a text and an output_path')
+        items.append({
+            'text': row['text'],
+            'speaker': row.get('speaker') or None,
+            'speed': float(row.get('speed') or 1.0),
+            'output_path': output_path,
+        })
+    return items
+
+
+def _speaker_id(spk2id, speaker):
+    if speaker is None:
+        return list(spk2id.values())[0]
+    if speaker in spk2id:
+        return spk2id[speaker]
+    try:
+        return int(speaker)
+    except ValueError:
+        raise ValueError(f'Unknown speaker {speaker!r}, expected one of {list(spk2id)}')
+
+
+def _write(audio, output_path, sr):
+    # write next to the target and rename, so an interrupted run never
+    # leaves a truncated file that a resumed run would skip
+    root, ext = os.path.splitext(output_path)
+    tmp_path = root + '.part' + ext
+    soundfile.write(tmp_path, audio, sr)
+    os.replace(tmp_path, output_path)
+
+
+def synthesize_manifest(tts, items, batch_size=8, writers=4, overwrite=False, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, quiet=False):
+    """Synthesize every manifest item with one TTS.
+
+    Items are grouped by speaker and speed and sorted by length, so the
+    sentences of a batch have similar lengths and little padding. Finished
+    items are encoded and written by a pool of `writers` threads while the
+    model moves on. Items whose output_path exists are skipped unless
+    overwrite is set; items without any sentence are reported as empty
+    and get no output. Returns the run statistics.
+    """
+    sr = tts.hps.data.sampling_rate
+    start = time.perf_counter()
+    todo = [item for item in items if overwrite or not os.path.exists(item['output_path'])]
+
+    groups = {}
+    for item in todo:
+        key = (_speaker_id(tts.hps.data.spk2id, item['speaker']), item['speed'])
+        groups.setdefault(key, []).append(item)
+
+    # (speaker_id, speed, [(item, sentence)]) per batch
+    batches = []
+    pending = {}
+    empty = []
+    for (speaker_id, speed), group in groups.items():
+        sentences = []
+        for item in sorted(group, key=lambda item: len(item['text'])):
+            texts = tts.split_sentences_into_pieces(item['text'], tts.language, quiet=True)
+            if not texts:
+                # nothing to say, e.g. only punctuation: no output file
+                print(f" > Skipping {item['output_path']}: no sentences in {item['text']!r}")
+                empty.append(item)
+                continue
+            pending[id(item)] = [None] * len(texts)
+            sentences += [(item, i, t) for i, t in enumerate(texts)]
+        for i in range(0, len(sentences), batch_size):
+            batches.append((speaker_id, speed, sentences[i:i + batch_size]))
+
+    n_sentences, seconds = 0, 0.
+    futures = []
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        for speaker_id, speed, batch in (batches if quiet else tqdm(batches)):
+            features = tts.texts_to_features([t for _, _, t in batch])
+            audios = tts.infer_batch(
+                features,
+                speaker_id,
+                sdp_ratio=sdp_ratio,
+                noise_scale=noise_scale,
+                noise_scale_w=noise_scale_w,
+                speed=speed,
+            )
+            del features
+            for (item, i, _), audio in zip(batch, audios):
+                parts = pending[id(item)]
+                parts[i] = audio
+                if all(p is not None for p in parts):
+                    del pending[id(item)]
+                    audio = tts.audio_numpy_concat(parts, sr=sr, speed=speed)
+                    seconds += audio.size / sr
+                    dirname = os.path.dirname(item['output_path'])
+                    if dirname:
+                        os.makedirs(dirname, exist_ok=True)
+                    futures.append(pool.submit(_write, audio, item['output_path'], sr))
+            n_sentences += len(batch)
+        for f in futures:
+            f.result()
+
+    elapsed = time.perf_counter() - start
+    done = len(todo) - len(empty)
+    return {
+        'items': done,
+        'skipped': len(items) - len(todo),
+        'empty': len(empty),
+        'sentences': n_sentences,
+        'audio_seconds': seconds,
+        'elapsed': elapsed,
+        'items_per_second': done / elapsed if elapsed else 0.,
+        'rtf': elapsed / seconds if seconds else 0.,
+    }
+
+
+@click.command
+@click.argument('manifest')
+@click.option('--language', '-l', default='EN', help='Language, defaults to English', type=click.Choice(['EN', 'ES', 'FR', 'ZH', 'JP', 'KR'], case_sensitive=False))
+@click.option('--device', '-d', default='auto', help='Device, defaults to auto')
+@click.option('--batch-size', '-b', default=8, help='Sentences synthesized per forward pass, defaults to 8', type=int)
+@click.option('--writers', '-w', default=4, help='Threads encoding and writing audio files, defaults to 4', type=int)
+@click.option('--overwrite', is_flag=True, default=False, help='Synthesize items whose output already exists')
+@click.option('--ckpt-path', '-c', default=None, help='Checkpoint to load instead of the released model')
+@click.option('--config-path', default=None, help='config.json of --ckpt-path')
+def main(manifest, language, device, batch_size, writers, overwrite, ckpt_path, config_path):
+    """Synthesize every entry of a JSONL or CSV manifest (text, speaker, speed, output_path)."""
+    from .api import TTS
+    items = load_manifest(manifest)
+    model = TTS(language=language.upper(), device=device, ckpt_path=ckpt_path, config_path=config_path)
+    stats = synthesize_manifest(model, items, batch_size=batch_size, writers=writers, overwrite=overwrite)
+    for k, v in stats.items():
+        print(f" > {k}: {v:.2f}" if isinstance(v, float) else f" > {k}: {v}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import math
+import contextlib
 import torch
 from torch.nn import functional as F
 
@@ -118,6 +119,37 @@ def shift_1d(x):
     return x
 
 
+def autocast_disabled(device):
+    """Run a block in fp32 even inside an autocast region."""
+    if device.type in ("cpu", "cuda"):
+        return torch.autocast(device.type, enabled=False)
+    return contextlib.nullcontext()
+
+
+def bucket_length(length, buckets):
+    """Smallest bucket >= length; past the largest bucket, the next
+    multiple of it."""
+    for b in buckets:
+        if length <= b:
+            return b
+    return -(-length // buckets[-1]) * buckets[-1]
+
+
+def speaker_projection(layer, g, project=None):
+    """layer(g) (or project(g)) for a speaker conditioning layer.
+
+    If g carries a `projections` dict (see
+    SynthesizerTrn.speaker_conditioning) the result is computed once per
+    layer and reused for later calls with the same g.
+    """
+    projections = getattr(g, "projections", None)
+    if projections is None:
+        return project(g) if project else layer(g)
+    if layer not in projections:
+        projections[layer] = project(g) if project else layer(g)
+    return projections[layer]
+
+
 def sequence_mask(length, max_length=None):
     if max_length is None:
         max_length = length.max()
@@ -125,6 +157,25 @@ def sequence_mask(length, max_length=None):
     return x.unsqueeze(0) < length.unsqueeze(1)
 
 
+def expand_by_duration(duration, y_mask, *xs):
+    """Repeat each step of xs ([b, d, t_x]) duration[t_x] times along a
+    y_mask.size(2) long frame axis.
+
+    Same result as a matmul with generate_path's alignment, but a gather
+    over cumulative durations instead of a dense [b, 1, t_y, t_x] path.
+    """
+    t_x, t_y = duration.size(2), y_mask.size(2)
+    cum_duration = torch.cumsum(duration[:, 0], -1).contiguous()
+    frames = torch.arange(t_y, device=duration.device, dtype=cum_duration.dtype)
+    index = torch.searchsorted(cum_duration, frames.expand(duration.size(0), t_y).contiguous(), right=True)
+    frame_mask = (index < t_x).unsqueeze(1).to(y_mask.dtype) * y_mask
+    index = index.clamp_max(t_x - 1).unsqueeze(1)
+    return [
+        torch.gather(x, 2, index.expand(-1, x.size(1), -1)) * frame_mask.to(x.dtype)
+        for x in xs
+    ]
+
+
 def generate_path(duration, mask):
     """
     duration: [b, 1, t_x]
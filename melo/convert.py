@@ -0,0 +1,48 @@
+import click
+import torch
+
+from .models import SynthesizerTrn
+from .download_utils import load_state_dict, load_or_download_config, convert_checkpoint, LANG_TO_HF_REPO_ID
+
+
+def export_for_inference(ckpt_path, hps, output_path, sdp_ratio=None):
+    """Write a compact inference checkpoint: no enc_q, only the duration
+    predictors sdp_ratio needs and weight norm folded into the convs."""
+    with torch.device('meta'):
+        model = SynthesizerTrn.for_inference(hps, sdp_ratio=sdp_ratio)
+    keys = set(model.state_dict())
+    state_dict = {k: v for k, v in load_state_dict(ckpt_path, 'cpu').items() if k in keys}
+    model.load_state_dict(state_dict, strict=True, assign=True)
+    model.remove_weight_norm()
+    state_dict = {k: v.contiguous() for k, v in model.state_dict().items()}
+    if output_path.endswith('.safetensors'):
+        from safetensors.torch import save_file
+        save_file(state_dict, output_path)
+    else:
+        torch.save({'model': state_dict}, output_path)
+    return output_path
+
+
+@click.command
+@click.argument('output_path')
+@click.option('--ckpt-path', '-c', default=None, help='checkpoint.pth to convert, defaults to the released model of --language')
+@click.option('--config-path', default=None, help='config.json of --ckpt-path, needed with --inference')
+@click.option('--language', '-l', default='EN', help='Language of the released model to convert', type=click.Choice(list(LANG_TO_HF_REPO_ID), case_sensitive=False))
+@click.option('--inference', '-i', is_flag=True, default=False, help='Strip training-only modules and weight norm')
+@click.option('--sdp-ratio', default=None, type=float, help='With --inference, keep only the duration predictors this ratio uses')
+def main(output_path, ckpt_path, config_path, language, inference, sdp_ratio):
+    """Convert a checkpoint.pth into a .safetensors (or compact .pth) file for fast loading."""
+    language = language.upper()
+    if ckpt_path is None:
+        from huggingface_hub import hf_hub_download
+        ckpt_path = hf_hub_download(repo_id=LANG_TO_HF_REPO_ID[language], filename="checkpoint.pth")
+    if inference:
+        hps = load_or_download_config(language, config_path=config_path)
+        export_for_inference(ckpt_path, hps, output_path, sdp_ratio=sdp_ratio)
+    else:
+        convert_checkpoint(ckpt_path, output_path)
+    print(f" > Wrote {output_path}")
+    print(f" > Load it with TTS(language=..., ckpt_path={output_path!r})")
+
+if __name__ == "__main__":
+    main()
@@ -61,7 +61,39 @@ def load_or_download_model(locale, device, use_hf=True, ckpt_path=None):
         else:
             assert language in DOWNLOAD_CKPT_URLS
             ckpt_path = cached_path(DOWNLOAD_CKPT_URLS[language])
-    return torch.load(ckpt_path, map_location=device)
+    return {'model': load_state_dict(ckpt_path, device)}
+
+# submodules only used by SynthesizerTrn.forward during training
+TRAINING_ONLY_PREFIXES = ('enc_q.',)
+
+def strip_training_keys(state_dict):
+    return {k: v for k, v in state_dict.items() if not k.startswith(TRAINING_ONLY_PREFIXES)}
+
+def load_state_dict(ckpt_path, device='cpu'):
+    """Load generator weights from a .safetensors file or a checkpoint.pth.
+
+    Both are memory-mapped where possible, so the tensors can be assigned
+    into the model without a second copy in RAM. Optimizer state and
+    training-only submodules are dropped.
+    """
+    if ckpt_path.endswith('.safetensors'):
+        from safetensors.torch import load_file
+        state_dict = load_file(ckpt_path, device=str(device))
+    else:
+        try:
+            checkpoint_dict = torch.load(ckpt_path, map_location=device, mmap=True)
+        except (RuntimeError, TypeError):
+            # legacy (non-zip) pickles or an old torch without mmap
+            checkpoint_dict = torch.load(ckpt_path, map_location=device)
+        state_dict = checkpoint_dict.get('model', checkpoint_dict)
+    return strip_training_keys(state_dict)
+
+def convert_checkpoint(ckpt_path, output_path):
+    """Write the inference weights of a checkpoint.pth as .safetensors."""
+    from safetensors.torch import save_file
+    state_dict = load_state_dict(ckpt_path, 'cpu')
+    save_file({k: v.contiguous() for k, v in state_dict.items()}, output_path)
+    return output_path
 
 def load_pretrain_model():
     return [cached_path(url) for url in PRETRAINED_MODELS.values()]
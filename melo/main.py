@@ -14,7 +14,10 @@ import random
 @click.option('--speaker', '-spk', default='EN-Default', help='Speaker ID, only for English, leave empty for default, ignored if not English. If English, defaults to "EN-Default"', type=click.Choice(['EN-Default', 'EN-US', 'EN-BR', 'EN_INDIA', 'EN-AU']))
 @click.option('--speed', '-s', default=1.0, help='Speed, defaults to 1.0', type=float)
 @click.option('--device', '-d', default='auto', help='Device, defaults to auto')
-def main(text, file, output_path, language, speaker, speed, device, nondeterminism):
+@click.option('--batch-size', '-b', default=1, help='Sentences synthesized per forward pass, defaults to 1', type=int)
+@click.option('--stream', is_flag=True, show_default=True, default=False, help='Append each sentence to the output file as it is synthesized')
+@click.option('--workers', '-w', default=1, help='Render on this many cpu worker processes, defaults to 1 (no pool); not combinable with --stream or a --device other than cpu', type=int)
+def main(text, file, output_path, language, speaker, speed, device, nondeterminism, batch_size, stream, workers):
     if nondeterminism:
         seed = 0
         torch.manual_seed(True)
@@ -34,6 +37,19 @@ def main(text, file, output_path, language, speaker, speed, device, nondetermini
     if speaker == '': speaker = None
     if (not language == 'EN') and speaker:
         warnings.warn('You specified a speaker but the language is English.')
+    if workers > 1:
+        # the worker pool renders on cpu and writes the file once at the end
+        if device not in ('auto', 'cpu'):
+            raise ValueError(f'--workers renders on cpu worker processes, --device {device} is not supported with it.')
+        if stream:
+            raise ValueError('--stream is not supported with --workers, the rendered file is written at the end.')
+        from melo.render import DocumentRenderer
+        with DocumentRenderer(language, workers=workers) as renderer:
+            speaker_ids = renderer.hps.data.spk2id
+            spkr = speaker_ids[speaker if language == 'EN' and speaker else list(speaker_ids.keys())[0]]
+            noise = dict(noise_scale=0.0, noise_scale_w=0.0) if nondeterminism else {}
+            renderer.render(text, spkr, output_path, speed=speed, batch_size=batch_size, **noise)
+        return
     from melo.api import TTS
     model = TTS(language=language, device=device)
     speaker_ids = model.hps.data.spk2id
@@ -44,8 +60,8 @@ def main(text, file, output_path, language, speaker, speed, device, nondetermini
         spkr = speaker_ids[list(speaker_ids.keys())[0]]
     if nondeterminism:
         model.tts_to_file(text, spkr, output_path, speed=speed,
-                          noise_scale=0.0, noise_scale_w=0.0)
+                          noise_scale=0.0, noise_scale_w=0.0, batch_size=batch_size, stream=stream)
     else:
-        model.tts_to_file(text, spkr, output_path, speed=speed, )
+        model.tts_to_file(text, spkr, output_path, speed=speed, batch_size=batch_size, stream=stream)
 if __name__ == "__main__":
     main()
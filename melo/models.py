@@ -209,12 +209,13 @@ class StochasticDurationPredictor(nn.Module):
         if gin_channels != 0:
             self.cond = nn.Conv1d(gin_channels, filter_channels, 1)
 
-    def forward(self, x, x_mask, w=None, g=None, reverse=False, noise_scale=1.0):
+    def forward(self, x, x_mask, w=None, g=None, reverse=False, noise_scale=1.0, noise=None):
+        # noise: the [b, 2, t] standard normal draw of reverse, to pass it in
+        # from outside (the onnx encoder takes it as an input)
         x = torch.detach(x)
         x = self.pre(x)
         if g is not None:
-            g = torch.detach(g)
-            x = x + self.cond(g)
+            x = x + commons.speaker_projection(self.cond, g, lambda g: self.cond(torch.detach(g)))
         x = self.convs(x, x_mask)
         x = self.proj(x) * x_mask
 
@@ -260,10 +261,9 @@ class StochasticDurationPredictor(nn.Module):
         else:
             flows = list(reversed(self.flows))
             flows = flows[:-2] + [flows[-1]]  # remove a useless vflow
-            z = (
-                torch.randn(x.size(0), 2, x.size(2)).to(device=x.device, dtype=x.dtype)
-                * noise_scale
-            )
+            if noise is None:
+                noise = torch.randn(x.size(0), 2, x.size(2))
+            z = noise.to(device=x.device, dtype=x.dtype) * noise_scale
             for flow in flows:
                 z = flow(z, x_mask, g=x, reverse=reverse)
             z0, z1 = torch.split(z, [1, 1], 1)
@@ -300,8 +300,7 @@ class DurationPredictor(nn.Module):
     def forward(self, x, x_mask, g=None):
         x = torch.detach(x)
         if g is not None:
-            g = torch.detach(g)
-            x = x + self.cond(g)
+            x = x + commons.speaker_projection(self.cond, g, lambda g: self.cond(torch.detach(g)))
         x = self.conv_1(x * x_mask)
         x = torch.relu(x)
         x = self.norm_1(x)
@@ -362,6 +361,7 @@ class TextEncoder(nn.Module):
             gin_channels=self.gin_channels,
         )
         self.proj = nn.Conv1d(hidden_channels, out_channels * 2, 1)
+        self.scale_folded = False
 
     def forward(self, x, x_lengths, tone, language, bert, ja_bert, g=None):
         bert_emb = self.bert_proj(bert).transpose(1, 2)
@@ -372,9 +372,9 @@ class TextEncoder(nn.Module):
             + self.language_emb(language)
             + bert_emb
             + ja_bert_emb
-        ) * math.sqrt(
-            self.hidden_channels
-        )  # [b, t, h]
+        )
+        if not self.scale_folded:
+            x = x * math.sqrt(self.hidden_channels)  # [b, t, h]
         x = torch.transpose(x, 1, -1)  # [b, h, t]
         x_mask = torch.unsqueeze(commons.sequence_mask(x_lengths, x.size(2)), 1).to(
             x.dtype
@@ -386,6 +386,17 @@ class TextEncoder(nn.Module):
         m, logs = torch.split(stats, self.out_channels, dim=1)
         return x, m, logs, x_mask
 
+    @torch.no_grad()
+    def fold_scaling(self):
+        """Fold the sqrt(hidden_channels) input scaling into the embeddings."""
+        if self.scale_folded:
+            return
+        scale = math.sqrt(self.hidden_channels)
+        for layer in [self.emb, self.tone_emb, self.language_emb, self.bert_proj, self.ja_bert_proj]:
+            for p in layer.parameters():
+                p.mul_(scale)
+        self.scale_folded = True
+
 
 class ResidualCouplingBlock(nn.Module):
     def __init__(
@@ -518,6 +529,8 @@ class Generator(torch.nn.Module):
 
         self.conv_post = Conv1d(ch, 1, 7, 1, padding=3, bias=False)
         self.ups.apply(init_weights)
+        self.upsample_factor = math.prod(upsample_rates)
+        self.scale_folded = False
 
         if gin_channels != 0:
             self.cond = nn.Conv1d(gin_channels, upsample_initial_channel, 1)
@@ -525,7 +538,7 @@ class Generator(torch.nn.Module):
     def forward(self, x, g=None):
         x = self.conv_pre(x)
         if g is not None:
-            x = x + self.cond(g)
+            x = x + commons.speaker_projection(self.cond, g)
 
         for i in range(self.num_upsamples):
             x = F.leaky_relu(x, modules.LRELU_SLOPE)
@@ -536,13 +549,68 @@ class Generator(torch.nn.Module):
                     xs = self.resblocks[i * self.num_kernels + j](x)
                 else:
                     xs += self.resblocks[i * self.num_kernels + j](x)
-            x = xs / self.num_kernels
+            if not self.scale_folded:
+                x = xs / self.num_kernels
+            else:
+                x = xs
         x = F.leaky_relu(x)
         x = self.conv_post(x)
-        x = torch.tanh(x)
+        x = torch.tanh(x.float())
 
         return x
 
+    def receptive_field(self):
+        """Input frames of context needed on each side of an output sample."""
+        ctx = self.conv_pre.padding[0]
+        scale = 1
+        for i, up in enumerate(self.ups):
+            ctx += math.ceil(up.kernel_size[0] / up.stride[0]) / scale
+            scale *= up.stride[0]
+            blocks = self.resblocks[i * self.num_kernels : (i + 1) * self.num_kernels]
+            ctx += max(
+                sum(c.padding[0] for c in block.modules() if isinstance(c, Conv1d))
+                for block in blocks
+            ) / scale
+        ctx += self.conv_post.padding[0] / scale
+        return int(math.ceil(ctx)) + 1
+
+    def stream(self, x, g=None, chunk_frames=32, context_frames=None):
+        """Vocode x window by window, yielding waveform chunks as they are ready.
+
+        Each window of chunk_frames latent frames is decoded together with
+        context_frames of neighbouring frames on both sides, which are then
+        cut away again. With the default context (the receptive field) the
+        concatenated chunks match a full forward pass up to float rounding,
+        so no cross-fade is needed.
+        """
+        if context_frames is None:
+            context_frames = self.receptive_field()
+        hop = self.upsample_factor
+        t = x.size(2)
+        # windows vary in length, a static-shape compiled forward would
+        # recompile for each (see TTS.compile_for_inference)
+        forward = getattr(self, 'eager_forward', self.forward)
+        for start in range(0, t, chunk_frames):
+            end = min(start + chunk_frames, t)
+            lo = max(start - context_frames, 0)
+            hi = min(end + context_frames, t)
+            o = forward(x[:, :, lo:hi], g=g)
+            yield o[:, :, (start - lo) * hop : (end - lo) * hop]
+
+    @torch.no_grad()
+    def fold_scaling(self):
+        """Fold the 1/num_kernels resblock averaging into the following conv.
+
+        leaky_relu is positively homogeneous, so the scale can move past it
+        into the next upsampling conv (or conv_post). Needs weight norm
+        removed first.
+        """
+        if self.scale_folded:
+            return
+        for layer in list(self.ups)[1:] + [self.conv_post]:
+            layer.weight.mul_(1. / self.num_kernels)
+        self.scale_folded = True
+
     def remove_weight_norm(self):
         print("Removing weight norm...")
         for layer in self.ups:
@@ -846,6 +914,8 @@ class SynthesizerTrn(nn.Module):
             upsample_kernel_sizes,
             gin_channels=gin_channels,
         )
+        # inference-only builds (see for_inference) leave out enc_q and the
+        # duration predictor their sdp_ratio never uses
         self.enc_q = PosteriorEncoder(
             spec_channels,
             inter_channels,
@@ -854,7 +924,7 @@ class SynthesizerTrn(nn.Module):
             1,
             16,
             gin_channels=gin_channels,
-        )
+        ) if kwargs.get("use_enc_q", True) else None
         if use_transformer_flow:
             self.flow = TransformerCouplingBlock(
                 inter_channels,
@@ -879,10 +949,10 @@ class SynthesizerTrn(nn.Module):
             )
         self.sdp = StochasticDurationPredictor(
             hidden_channels, 192, 3, 0.5, 4, gin_channels=gin_channels
-        )
+        ) if kwargs.get("use_sdp_predictor", True) else None
         self.dp = DurationPredictor(
             hidden_channels, 256, 3, 0.5, gin_channels=gin_channels
-        )
+        ) if kwargs.get("use_dp_predictor", True) else None
 
         if n_speakers > 0:
             self.emb_g = nn.Embedding(n_speakers, gin_channels)
@@ -890,6 +960,61 @@ class SynthesizerTrn(nn.Module):
             self.ref_enc = ReferenceEncoder(spec_channels, gin_channels, layernorm=norm_refenc)
         self.use_vc = use_vc
 
+    @classmethod
+    def for_inference(cls, hps, sdp_ratio=None, weight_norm=True):
+        """Build a model with only the modules infer() needs.
+
+        enc_q is never built. With sdp_ratio=0 the stochastic duration
+        predictor is left out, with sdp_ratio=1 the deterministic one;
+        None keeps both. weight_norm=False gives the fused layout written
+        by `melo-convert --inference`.
+        """
+        model = cls(
+            len(hps.symbols),
+            hps.data.filter_length // 2 + 1,
+            hps.train.segment_size // hps.data.hop_length,
+            n_speakers=hps.data.n_speakers,
+            num_tones=hps.num_tones,
+            num_languages=hps.num_languages,
+            use_enc_q=False,
+            use_sdp_predictor=sdp_ratio != 0,
+            use_dp_predictor=sdp_ratio != 1,
+            **hps.model,
+        )
+        if not weight_norm:
+            model.remove_weight_norm()
+        return model
+
+    def speaker_conditioning(self, sid):
+        """g for speaker `sid`, to pass as infer(g=...).
+
+        It carries a cache of the speaker projections of every module that
+        consumes g (the cond layers of dp, sdp, WN and Generator and the
+        spk_emb_linear of the text and flow encoders). They are filled in
+        by the first infer call and reused by later ones, and broadcast
+        over any batch size. Build it again after changing weights.
+        """
+        g = self.emb_g(torch.LongTensor([sid]).to(self.emb_g.weight.device)).unsqueeze(-1)
+        g.projections = {}
+        return g
+
+    def remove_weight_norm(self):
+        """Fold weight norm into plain conv weights; inference only."""
+        self.dec.remove_weight_norm()
+        for module in self.modules():
+            if isinstance(module, modules.WN):
+                module.remove_weight_norm()
+
+    def optimize_for_inference(self):
+        """Fold weight norm and constant scalings into the weights, in place.
+
+        Not reversible, so the model can no longer be trained afterwards.
+        """
+        if any(k.endswith('.weight_g') for k in self.state_dict()):
+            self.remove_weight_norm()
+        self.enc_p.fold_scaling()
+        self.dec.fold_scaling()
+        return self
 
     def forward(self, x, x_lengths, y, y_lengths, sid, tone, language, bert, ja_bert):
         if self.n_speakers > 0:
@@ -986,7 +1111,58 @@ class SynthesizerTrn(nn.Module):
         y=None,
         g=None,
         w_ceil_holder=None,
+        frame_buckets=None,
+        return_attn=False,
     ):
+        z, g, attn, y_mask, extras = self.infer_latent(
+            x,
+            x_lengths,
+            sid,
+            tone,
+            language,
+            bert,
+            ja_bert,
+            noise_scale=noise_scale,
+            length_scale=length_scale,
+            noise_scale_w=noise_scale_w,
+            sdp_ratio=sdp_ratio,
+            y=y,
+            g=g,
+            w_ceil_holder=w_ceil_holder,
+            frame_buckets=frame_buckets,
+            return_attn=return_attn,
+        )
+        o = self.dec(z[:, :, :max_len], g=g)
+        # print('max/min of o:', o.max(), o.min())
+        return o, attn, y_mask, extras
+
+    def infer_latent(
+        self,
+        x,
+        x_lengths,
+        sid,
+        tone,
+        language,
+        bert,
+        ja_bert,
+        noise_scale=0.667,
+        length_scale=1,
+        noise_scale_w=0.8,
+        sdp_ratio=0,
+        y=None,
+        g=None,
+        w_ceil_holder=None,
+        frame_buckets=None,
+        return_attn=False,
+    ):
+        """infer() up to the vocoder: returns the masked latent for self.dec,
+        the speaker conditioning g, attn, y_mask and (z, z_p, m_p, logs_p).
+
+        With frame_buckets the frame axis is padded up to a bucket length
+        (see commons.bucket_length), so compiled modules see few shapes.
+        The dense [b, 1, t_y, t_x] alignment attn is only built with
+        return_attn, otherwise it is None; w_ceil_holder gets the durations.
+        """
         # x, m_p, logs_p, x_mask = self.enc_p(x, x_lengths, tone, language, bert)
         # g = self.gst(y)
         if g is None:
@@ -1001,9 +1177,20 @@ class SynthesizerTrn(nn.Module):
         x, m_p, logs_p, x_mask = self.enc_p(
             x, x_lengths, tone, language, bert, ja_bert, g=g_p
         )
-        logw = self.sdp(x, x_mask, g=g, reverse=True, noise_scale=noise_scale_w) * (
-            sdp_ratio
-        ) + self.dp(x, x_mask, g=g) * (1 - sdp_ratio)
+        # an inference build may only have one of the two predictors
+        if self.sdp is None:
+            sdp_ratio = 0
+        elif self.dp is None:
+            sdp_ratio = 1
+        # durations get rounded up below and the sdp spline flows are
+        # sensitive, so the predictors stay in fp32 under autocast
+        with commons.autocast_disabled(x.device):
+            x = x.float()
+            logw = 0
+            if sdp_ratio > 0:
+                logw = self.sdp(x, x_mask, g=g, reverse=True, noise_scale=noise_scale_w) * sdp_ratio
+            if sdp_ratio < 1:
+                logw = logw + self.dp(x, x_mask, g=g) * (1 - sdp_ratio)
         w = torch.exp(logw) * x_mask * length_scale
         
         w_ceil = torch.ceil(w)
@@ -1013,28 +1200,28 @@ class SynthesizerTrn(nn.Module):
         if w_ceil_holder is not None:
             w_ceil_holder.append(w_ceil)
         y_lengths = torch.clamp_min(torch.sum(w_ceil, [1, 2]), 1).long()
-        y_mask = torch.unsqueeze(commons.sequence_mask(y_lengths, None), 1).to(
+        y_max = None
+        if frame_buckets:
+            y_max = commons.bucket_length(int(y_lengths.max()), frame_buckets)
+        y_mask = torch.unsqueeze(commons.sequence_mask(y_lengths, y_max), 1).to(
             x_mask.dtype
         )
-        attn_mask = torch.unsqueeze(x_mask, 2) * torch.unsqueeze(y_mask, -1)
-        attn = commons.generate_path(w_ceil, attn_mask)
+        attn = None
+        if return_attn:
+            attn_mask = torch.unsqueeze(x_mask, 2) * torch.unsqueeze(y_mask, -1)
+            attn = commons.generate_path(w_ceil, attn_mask)
 
-        m_p = torch.matmul(attn.squeeze(1), m_p.transpose(1, 2)).transpose(
-            1, 2
-        )  # [b, t', t], [b, t, d] -> [b, d, t']
-        logs_p = torch.matmul(attn.squeeze(1), logs_p.transpose(1, 2)).transpose(
-            1, 2
-        )  # [b, t', t], [b, t, d] -> [b, d, t']
+        # [b, d, t] -> [b, d, t']
+        m_p, logs_p = commons.expand_by_duration(w_ceil, y_mask, m_p, logs_p)
 
         z_p = m_p + torch.randn_like(m_p) * torch.exp(logs_p) * noise_scale
         z = self.flow(z_p, y_mask, g=g, reverse=True)
-        o = self.dec((z * y_mask)[:, :, :max_len], g=g)
-        # print('max/min of o:', o.max(), o.min())
-        w_dur = attn.sum(dim=2)
-        #print("AT", w_dur.size(-1))
-        #print("AT", w_dur)
-        print("AT", w_dur.long())
-        return o, attn, y_mask, (z, z_p, m_p, logs_p)
+        if attn is not None:
+            w_dur = attn.sum(dim=2)
+            #print("AT", w_dur.size(-1))
+            #print("AT", w_dur)
+            print("AT", w_dur.long())
+        return z * y_mask, g, attn, y_mask, (z, z_p, m_p, logs_p)
 
     def voice_conversion(self, y, y_lengths, sid_src, sid_tgt, tau=1.0):        
         g_src = sid_src
@@ -0,0 +1,230 @@
+import os
+import inspect
+import numpy as np
+import torch
+import torch.nn as nn
+
+ENCODER_FILE = 'encoder.onnx'
+DECODER_FILE = 'decoder.onnx'
+
+
+class OnnxEncoder(nn.Module):
+    """enc_p and the duration predictors: text in, prior stats and
+    rounded durations out."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x, x_lengths, sid, tone, language, bert, ja_bert, noise_scale_w, length_scale, sdp_ratio, sdp_noise):
+        m = self.model
+        g = m.emb_g(sid).unsqueeze(-1)
+        x, m_p, logs_p, x_mask = m.enc_p(x, x_lengths, tone, language, bert, ja_bert, g=None if m.use_vc else g)
+        if m.sdp is None:
+            logw = m.dp(x, x_mask, g=g)
+        elif m.dp is None:
+            logw = m.sdp(x, x_mask, g=g, reverse=True, noise_scale=noise_scale_w, noise=sdp_noise)
+        else:
+            logw = m.sdp(x, x_mask, g=g, reverse=True, noise_scale=noise_scale_w, noise=sdp_noise) * sdp_ratio \
+                + m.dp(x, x_mask, g=g) * (1 - sdp_ratio)
+        w_ceil = torch.ceil(torch.exp(logw) * x_mask * length_scale)
+        return m_p, logs_p, x_mask, w_ceil, g
+
+
+class OnnxDecoder(nn.Module):
+    """flow (reverse) and the vocoder: sampled prior in, waveform out."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, z_p, y_mask, g):
+        m = self.model
+        z = m.flow(z_p, y_mask, g=g, reverse=True)
+        return m.dec(z * y_mask, g=g)
+
+
+def _exporter_kwargs():
+    # the TorchScript exporter: the dynamo one (default from torch 2.9) can't
+    # trace the data dependent branches of the spline flows (transforms.py)
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        return {'dynamo': False}
+    return {}
+
+
+def export_onnx(model, output_dir, opset_version=17):
+    """Export a SynthesizerTrn as encoder.onnx and decoder.onnx.
+
+    The length regulation between the two (commons.generate_path and the
+    prior expansion) is data dependent and runs in numpy, see
+    OnnxSynthesizer. The stochastic duration predictor noise is an input
+    of the encoder, so all sampling happens outside onnxruntime. The model
+    is optimized for inference in place.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    model = model.cpu().eval().optimize_for_inference()
+
+    # long enough dummies that relative attention takes its padded branch
+    n, t = 64, 256
+    x = torch.randint(1, model.n_vocab, (1, n))
+    args = (
+        x,
+        torch.LongTensor([n]),
+        torch.LongTensor([0]),
+        torch.zeros_like(x),
+        torch.zeros_like(x),
+        torch.randn(1, 1024, n),
+        torch.randn(1, 768, n),
+        torch.tensor(0.8),
+        torch.tensor(1.0),
+        torch.tensor(0.2),
+        torch.randn(1, 2, n),
+    )
+    with torch.no_grad():
+        torch.onnx.export(
+            OnnxEncoder(model),
+            args,
+            os.path.join(output_dir, ENCODER_FILE),
+            input_names=['x', 'x_lengths', 'sid', 'tone', 'language', 'bert', 'ja_bert',
+                         'noise_scale_w', 'length_scale', 'sdp_ratio', 'sdp_noise'],
+            output_names=['m_p', 'logs_p', 'x_mask', 'w_ceil', 'g'],
+            dynamic_axes={
+                'x': {0: 'batch', 1: 'phones'},
+                'x_lengths': {0: 'batch'},
+                'sid': {0: 'batch'},
+                'tone': {0: 'batch', 1: 'phones'},
+                'language': {0: 'batch', 1: 'phones'},
+                'bert': {0: 'batch', 2: 'phones'},
+                'ja_bert': {0: 'batch', 2: 'phones'},
+                'sdp_noise': {0: 'batch', 2: 'phones'},
+                'm_p': {0: 'batch', 2: 'phones'},
+                'logs_p': {0: 'batch', 2: 'phones'},
+                'x_mask': {0: 'batch', 2: 'phones'},
+                'w_ceil': {0: 'batch', 2: 'phones'},
+                'g': {0: 'batch'},
+            },
+            opset_version=opset_version,
+            **_exporter_kwargs(),
+        )
+        torch.onnx.export(
+            OnnxDecoder(model),
+            (torch.randn(1, model.inter_channels, t), torch.ones(1, 1, t), torch.randn(1, model.gin_channels, 1)),
+            os.path.join(output_dir, DECODER_FILE),
+            input_names=['z_p', 'y_mask', 'g'],
+            output_names=['audio'],
+            dynamic_axes={
+                'z_p': {0: 'batch', 2: 'frames'},
+                'y_mask': {0: 'batch', 2: 'frames'},
+                'g': {0: 'batch'},
+                'audio': {0: 'batch', 2: 'samples'},
+            },
+            opset_version=opset_version,
+            **_exporter_kwargs(),
+        )
+    return output_dir
+
+
+def expand_by_duration(w_ceil, y_mask, *xs):
+    """numpy commons.expand_by_duration."""
+    t_x, t_y = w_ceil.shape[2], y_mask.shape[2]
+    cum_duration = np.cumsum(w_ceil[:, 0], axis=-1)
+    index = np.stack([np.searchsorted(c, np.arange(t_y), side='right') for c in cum_duration])
+    frame_mask = (index < t_x)[:, None] * y_mask
+    index = np.minimum(index, t_x - 1)[:, None]
+    return [np.take_along_axis(x, index, axis=2) * frame_mask for x in xs]
+
+
+def generate_path(w_ceil, x_mask, y_mask):
+    """numpy commons.generate_path: [b, 1, t_x] durations -> [b, 1, t_y, t_x]."""
+    end = np.cumsum(w_ceil[:, 0], axis=-1)  # [b, t_x]
+    start = end - w_ceil[:, 0]
+    frames = np.arange(y_mask.shape[2])[None, :, None]  # [1, t_y, 1]
+    path = (frames >= start[:, None, :]) & (frames < end[:, None, :])
+    path = path * x_mask * y_mask[:, 0, :, None]
+    return path[:, None].astype(np.float32)
+
+
+class OnnxSynthesizer(object):
+    """Runs an export_onnx model through onnxruntime on CPU.
+
+    infer() mirrors SynthesizerTrn.infer, so TTS can use it in place of
+    the torch model. Its noise (duration predictor and prior) is drawn
+    with torch.randn in the same order as infer, so torch.manual_seed
+    seeds it.
+    """
+
+    def __init__(self, model_dir, providers=('CPUExecutionProvider',)):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.encoder = ort.InferenceSession(os.path.join(model_dir, ENCODER_FILE), options, providers=list(providers))
+        self.decoder = ort.InferenceSession(os.path.join(model_dir, DECODER_FILE), options, providers=list(providers))
+
+    @staticmethod
+    def exists(model_dir):
+        return model_dir is not None and all(
+            os.path.exists(os.path.join(model_dir, f)) for f in [ENCODER_FILE, DECODER_FILE])
+
+    def infer(
+        self,
+        x,
+        x_lengths,
+        sid,
+        tone,
+        language,
+        bert,
+        ja_bert,
+        noise_scale=0.667,
+        length_scale=1,
+        noise_scale_w=0.8,
+        max_len=None,
+        sdp_ratio=0,
+        frame_buckets=None,
+        return_attn=False,
+        **kwargs
+    ):
+        to_np = lambda t: t.detach().cpu().numpy()
+        # like infer, only draw the sdp noise when sdp_ratio uses it
+        if sdp_ratio > 0:
+            sdp_noise = torch.randn(x.size(0), 2, x.size(1))
+        else:
+            sdp_noise = torch.zeros(x.size(0), 2, x.size(1))
+        inputs = {
+            'x': to_np(x),
+            'x_lengths': to_np(x_lengths),
+            'sid': to_np(sid),
+            'tone': to_np(tone),
+            'language': to_np(language),
+            'bert': to_np(bert).astype(np.float32),
+            'ja_bert': to_np(ja_bert).astype(np.float32),
+            'noise_scale_w': np.array(noise_scale_w, dtype=np.float32),
+            'length_scale': np.array(length_scale, dtype=np.float32),
+            'sdp_ratio': np.array(sdp_ratio, dtype=np.float32),
+            'sdp_noise': to_np(sdp_noise),
+        }
+        # the exporter drops inputs the graph does not use (sdp_noise
+        # without a stochastic duration predictor)
+        names = set(i.name for i in self.encoder.get_inputs())
+        m_p, logs_p, x_mask, w_ceil, g = self.encoder.run(None, {k: v for k, v in inputs.items() if k in names})
+
+        # length regulation, as in SynthesizerTrn.infer_latent
+        y_lengths = np.maximum(w_ceil.sum(axis=(1, 2)), 1).astype(np.int64)
+        t_y = int(y_lengths.max())
+        if frame_buckets:
+            from .commons import bucket_length
+            t_y = bucket_length(t_y, frame_buckets)
+        y_mask = (np.arange(t_y)[None, :] < y_lengths[:, None]).astype(np.float32)[:, None]
+        attn = generate_path(w_ceil, x_mask, y_mask) if return_attn else None
+        m_p, logs_p = expand_by_duration(w_ceil, y_mask, m_p, logs_p)
+        # torch's generator, so torch.manual_seed makes this reproducible too
+        noise = torch.randn(m_p.shape).numpy()
+        z_p = m_p + noise * np.exp(logs_p) * noise_scale
+
+        if max_len is not None:
+            z_p, y_mask_dec = z_p[:, :, :max_len], y_mask[:, :, :max_len]
+        else:
+            y_mask_dec = y_mask
+        (o,) = self.decoder.run(None, {'z_p': z_p.astype(np.float32), 'y_mask': y_mask_dec, 'g': g})
+        if attn is not None:
+            attn = torch.from_numpy(attn)
+        return torch.from_numpy(o), attn, torch.from_numpy(y_mask), None
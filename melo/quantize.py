@@ -0,0 +1,209 @@
+import os
+import time
+import click
+import torch
+import torch.nn as nn
+
+from .mel_processing import mel_spectrogram_torch
+
+CALIBRATION_DIR = os.path.join(os.path.dirname(__file__), '..', 'test', 'basetts_test_resources')
+
+CALIBRATION_FILES = {
+    'EN': 'en_egs_text.txt',
+    'ES': 'es_egs_text.txt',
+    'SP': 'es_egs_text.txt',
+    'FR': 'fr_egs_text.txt',
+    'JP': 'jp_egs_text.txt',
+    'KR': 'kr_egs_text.txt',
+    'ZH': 'zh_mix_en_egs_text.txt',
+    'ZH_MIX_EN': 'zh_mix_en_egs_text.txt',
+}
+
+
+class PointwiseLinear(nn.Module):
+    """A kernel-size-1 Conv1d computed as a Linear over the channel axis.
+
+    quantize_dynamic has int8 kernels for Linear but not for Conv1d, and
+    most of the text encoder, duration predictor and flow convs are 1x1.
+    """
+
+    def __init__(self, conv):
+        super().__init__()
+        self.linear = nn.Linear(conv.in_channels, conv.out_channels, bias=conv.bias is not None)
+        self.linear.weight = nn.Parameter(conv.weight.detach().squeeze(2))
+        if conv.bias is not None:
+            self.linear.bias = nn.Parameter(conv.bias.detach())
+
+    def forward(self, x):
+        return self.linear(x.transpose(1, 2)).transpose(1, 2)
+
+
+def _is_pointwise(m):
+    return (isinstance(m, nn.Conv1d) and m.kernel_size == (1,) and m.stride == (1,)
+            and m.padding == (0,) and m.dilation == (1,) and m.groups == 1)
+
+
+def pointwise_to_linear(module):
+    for name, child in module.named_children():
+        if _is_pointwise(child):
+            setattr(module, name, PointwiseLinear(child))
+        else:
+            pointwise_to_linear(child)
+    return module
+
+
+def quantize_int8(model):
+    """Dynamic int8 quantization of the Linear / 1x1 Conv1d layers of
+    enc_p, dp, flow and dec, in place. CPU only.
+
+    Coverage is partial: dynamic quantization has no kernel for Conv1d
+    with kernel_size > 1, so the vocoder (whose only 1x1 conv is cond),
+    the k=3 convs of dp and the FFN convs of the text encoder and flow
+    transformers stay in fp32, and so does the stochastic duration
+    predictor (its spline flows are sensitive). Most of the vocoder time
+    is therefore not sped up, see int8_coverage.
+    """
+    model.optimize_for_inference()
+    names = [n for n in ['enc_p', 'dp', 'flow', 'dec'] if getattr(model, n, None) is not None]
+    for name in names:
+        module = pointwise_to_linear(getattr(model, name))
+        setattr(model, name, torch.ao.quantization.quantize_dynamic(module, {nn.Linear}, dtype=torch.qint8, inplace=True))
+    return model
+
+
+def int8_coverage(model):
+    """Fraction of the conv / linear weights of each top-level module (and
+    of the whole model, under 'total') that are held in int8."""
+    from torch.ao.nn.quantized.dynamic import Linear as DynamicQuantizedLinear
+    coverage = {}
+    int8_total, all_total = 0, 0
+    for name, module in model.named_children():
+        int8, total = 0, 0
+        for m in module.modules():
+            if isinstance(m, DynamicQuantizedLinear):
+                n = m.weight().numel()
+                int8 += n
+            elif isinstance(m, (nn.Linear, nn.Conv1d, nn.ConvTranspose1d)):
+                n = m.weight.numel()
+            else:
+                continue
+            total += n
+        if total:
+            coverage[name] = int8 / total
+        int8_total += int8
+        all_total += total
+    coverage['total'] = int8_total / all_total if all_total else 0.
+    return coverage
+
+
+def bf16_supported(device):
+    if device.startswith('cuda'):
+        return torch.cuda.is_bf16_supported()
+    if device == 'cpu':
+        try:
+            return torch.ops.mkldnn._is_mkldnn_bf16_supported()
+        except (AttributeError, RuntimeError):
+            return False
+    return False
+
+
+def load_calibration_texts(language, path=None):
+    """Sentences from test/basetts_test_resources for `language`.
+
+    Dynamic quantization picks activation scales on the fly, so these only
+    serve as the evaluation set of quantization_report.
+    """
+    if path is None:
+        path = os.path.join(CALIBRATION_DIR, CALIBRATION_FILES[language])
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _log_mel(audio, hps):
+    y = torch.from_numpy(audio).float().unsqueeze(0)
+    return mel_spectrogram_torch(
+        y,
+        hps.data.filter_length,
+        hps.data.n_mel_channels,
+        hps.data.sampling_rate,
+        hps.data.hop_length,
+        hps.data.win_length,
+        hps.data.mel_fmin,
+        hps.data.mel_fmax,
+    )[0]
+
+
+def mel_distance(reference, audio, hps):
+    """Mean log-mel L1 distance between two waveforms, over their common length."""
+    n = min(len(reference), len(audio))
+    return (_log_mel(reference[:n], hps) - _log_mel(audio[:n], hps)).abs().mean().item()
+
+
+def check_mel_distance(distance, max_mel_distance):
+    """The regression check of the --max-mel-distance option."""
+    if distance > max_mel_distance:
+        raise ValueError(f"mel distance {distance:.4f} above {max_mel_distance}")
+
+
+def _synthesize(tts, text, speaker_id):
+    # no sampling noise so both models see the same durations and latents
+    start = time.perf_counter()
+    audio = tts.tts_to_file(text, speaker_id, noise_scale=0., noise_scale_w=0., quiet=True)
+    return audio, time.perf_counter() - start
+
+
+def quantization_report(reference, quantized, texts, speaker_id=0):
+    """Compare a quantized (or bf16) TTS against its fp32 reference on `texts`.
+
+    Returns the mean log-mel L1 distance (over the common length of each
+    pair), the real-time factor of both models and the fraction of conv /
+    linear weights of the optimized model that are int8 (int8_weights,
+    0 for bf16).
+    """
+    hps = reference.hps
+    sr = hps.data.sampling_rate
+    dist, seconds, t_ref, t_q = 0., 0., 0., 0.
+    for text in texts:
+        ref, dt_ref = _synthesize(reference, text, speaker_id)
+        out, dt_q = _synthesize(quantized, text, speaker_id)
+        dist += mel_distance(ref, out, hps)
+        seconds += len(ref) / sr
+        t_ref += dt_ref
+        t_q += dt_q
+    return {
+        'texts': len(texts),
+        'mel_distance': dist / len(texts),
+        'rtf_fp32': t_ref / seconds,
+        'rtf': t_q / seconds,
+        'int8_weights': int8_coverage(quantized.model)['total'],
+    }
+
+
+@click.command
+@click.option('--language', '-l', default='EN', help='Language, defaults to English')
+@click.option('--texts', '-t', default=None, help='Text file, one sentence per line, defaults to the test resources')
+@click.option('--limit', '-n', default=8, help='Number of sentences to compare', type=int)
+@click.option('--precision', '-p', default='int8', help='What to compare against fp32', type=click.Choice(['int8', 'bf16']))
+@click.option('--max-mel-distance', default=None, type=float, help='Exit with an error above this distance, for regression checks')
+def main(language, texts, limit, precision, max_mel_distance):
+    from .api import TTS
+    language = language.upper()
+    reference = TTS(language=language, device='cpu')
+    if precision == 'int8':
+        quantized = TTS(language=language, device='cpu', quantize='int8')
+    else:
+        quantized = TTS(language=language, device='cpu', precision='bf16')
+    texts = load_calibration_texts(language, texts)[:limit]
+    speaker_id = list(reference.hps.data.spk2id.values())[0]
+    report = quantization_report(reference, quantized, texts, speaker_id)
+    for k, v in report.items():
+        print(f" > {k}: {v:.4f}" if isinstance(v, float) else f" > {k}: {v}")
+    if max_mel_distance is not None:
+        try:
+            check_mel_distance(report['mel_distance'], max_mel_distance)
+        except ValueError as e:
+            raise SystemExit(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import soundfile
+import numpy as np
+
+from .split_utils import split_sentence
+from .download_utils import load_or_download_config
+
+# the TTS of this worker process, built once by _init_worker
+_tts = None
+
+
+def _init_worker(tts_kwargs, num_threads):
+    global _tts
+    import torch
+    from .api import TTS
+    torch.set_num_threads(num_threads)
+    _tts = TTS(**tts_kwargs)
+
+
+def _render_shard(args):
+    texts, speaker_id, params, batch_size = args
+    audios = []
+    for i in range(0, len(texts), batch_size):
+        features = _tts.texts_to_features(texts[i:i + batch_size])
+        audios += _tts.infer_batch(features, speaker_id, **params)
+    return audios
+
+
+def _language_str(language):
+    # what TTS.language ends up as, split_sentence only needs this
+    language = language.split('_')[0]
+    return 'ZH_MIX_EN' if language == 'ZH' else language
+
+
+class DocumentRenderer(object):
+    """Synthesizes long texts on a pool of worker processes.
+
+    Every worker builds its own TTS on cpu; checkpoints are memory mapped
+    (see download_utils.load_state_dict), so the workers share the page
+    cache of the weight file instead of each reading a copy. render()
+    splits the document with split_sentence, hands out contiguous shards of
+    shard_size sentences and stitches the shards back in order with
+    TTS.audio_numpy_concat.
+    """
+
+    def __init__(self, language, workers=None, threads_per_worker=None, use_hf=True, config_path=None, ckpt_path=None, **tts_kwargs):
+        from .api import TTS
+        workers = workers or os.cpu_count()
+        if threads_per_worker is None:
+            threads_per_worker = max(1, os.cpu_count() // workers)
+        tts_kwargs.update(language=language, device='cpu', use_hf=use_hf, config_path=config_path, ckpt_path=ckpt_path)
+        self.hps = load_or_download_config(language, use_hf=use_hf, config_path=config_path)
+        self.language = _language_str(language)
+        self.workers = workers
+        self.concat = TTS.audio_numpy_concat
+        # spawn, forking a process that already imported torch is not safe
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(tts_kwargs, threads_per_worker),
+        )
+
+    def render_iter(self, text, speaker_id, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0, shard_size=4, batch_size=1, quiet=False):
+        """Yield the audio of each shard, in document order."""
+        texts = split_sentence(text, language_str=self.language)
+        if not quiet:
+            print(f" > Text split to {len(texts)} sentences, rendering on {self.workers} workers.")
+        params = dict(sdp_ratio=sdp_ratio, noise_scale=noise_scale, noise_scale_w=noise_scale_w, speed=speed)
+        shards = [(texts[i:i + shard_size], speaker_id, params, batch_size) for i in range(0, len(texts), shard_size)]
+        sr = self.hps.data.sampling_rate
+        # map hands the shards out as workers free up and yields in order
+        for audios in self.executor.map(_render_shard, shards):
+            yield self.concat(audios, sr=sr, speed=speed)
+
+    def render(self, text, speaker_id, output_path=None, format=None, speed=1.0, **kwargs):
+        """Synthesize text and write it to output_path, or return it.
+
+        With an output_path shards are appended to the file as they
+        arrive, as in tts_to_file(stream=True).
+        """
+        sr = self.hps.data.sampling_rate
+        chunks = self.render_iter(text, speaker_id, speed=speed, **kwargs)
+        if output_path is None:
+            chunks = list(chunks)
+            return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+        with soundfile.SoundFile(output_path, 'w', samplerate=sr, channels=1, format=format) as f:
+            for chunk in chunks:
+                f.write(chunk)
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,111 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class _Job(object):
+    def __init__(self, features, speaker_id, params, bucket):
+        self.features = features
+        self.speaker_id = speaker_id
+        self.params = params
+        self.key = (speaker_id, params, bucket)
+        self.future = Future()
+
+
+class BatchScheduler(object):
+    """Collects sentence jobs from many callers and runs them as padded batches.
+
+    A single worker thread owns the model. Jobs arriving within max_wait_ms of
+    each other (or until max_batch_size is reached) are grouped by speaker,
+    synthesis parameters and phone length bucket, and each group goes through
+    one TTS.infer_batch call. Callers get a Future per sentence.
+    """
+
+    def __init__(self, tts, max_batch_size=8, max_wait_ms=10, length_bucket=64):
+        self.tts = tts
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.
+        self.length_bucket = length_bucket
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='melo-batch-scheduler', daemon=True)
+        self._thread.start()
+
+    def submit(self, text, speaker_id, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0):
+        """Queue one sentence; the text front-end runs in the calling thread."""
+        features = self.tts.text_to_features(text)
+        bucket = features[2].size(0) // self.length_bucket
+        params = (sdp_ratio, noise_scale, noise_scale_w, speed)
+        job = _Job(features, speaker_id, params, bucket)
+        self._queue.put(job)
+        return job.future
+
+    def synthesize(self, text, speaker_id, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0, progress=None):
+        """Synthesize every sentence of text; progress, if given, is called
+        as progress(done, total) each time a sentence finishes."""
+        texts = self.tts.split_sentences_into_pieces(text, self.tts.language, quiet=True)
+        futures = [
+            self.submit(t, speaker_id, sdp_ratio=sdp_ratio, noise_scale=noise_scale,
+                        noise_scale_w=noise_scale_w, speed=speed)
+            for t in texts
+        ]
+        audio_list = []
+        for f in futures:
+            audio_list.append(f.result())
+            if progress is not None:
+                progress(len(audio_list), len(futures))
+        return self.tts.audio_numpy_concat(audio_list, sr=self.tts.hps.data.sampling_rate, speed=speed)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self):
+        job = self._queue.get()
+        if job is None:
+            return None
+        jobs = [job]
+        deadline = time.monotonic() + self.max_wait
+        while len(jobs) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if job is None:
+                # finish what we have, then stop on the next collect
+                self._queue.put(None)
+                break
+            jobs.append(job)
+        return jobs
+
+    def _run(self):
+        while True:
+            jobs = self._collect()
+            if jobs is None:
+                break
+            groups = {}
+            for job in jobs:
+                groups.setdefault(job.key, []).append(job)
+            for group in groups.values():
+                self._run_batch(group)
+
+    def _run_batch(self, jobs):
+        sdp_ratio, noise_scale, noise_scale_w, speed = jobs[0].params
+        try:
+            audios = self.tts.infer_batch(
+                [job.features for job in jobs],
+                [job.speaker_id for job in jobs],
+                sdp_ratio=sdp_ratio,
+                noise_scale=noise_scale,
+                noise_scale_w=noise_scale_w,
+                speed=speed,
+            )
+        except Exception as e:
+            for job in jobs:
+                job.future.set_exception(e)
+            return
+        for job, audio in zip(jobs, audios):
+            job.future.set_result(audio)
@@ -0,0 +1,152 @@
+import json
+import asyncio
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+import numpy as np
+from aiohttp import web, WSMsgType
+
+
+class AsyncTTS(object):
+    """asyncio front for a TTS.
+
+    All inference runs on one dedicated executor thread, so the event loop
+    never blocks on the model. synthesize() advances the blocking
+    TTS.tts_iter one chunk per executor call; concurrent sessions therefore
+    interleave chunk by chunk instead of waiting for whole texts, and a
+    session that is cancelled or closed stops after its current chunk.
+    """
+
+    def __init__(self, tts, chunk_frames=32):
+        self.tts = tts
+        self.sr = tts.hps.data.sampling_rate
+        self.chunk_frames = chunk_frames
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='melo-inference')
+
+    def speaker_id(self, speaker=None):
+        spk2id = self.tts.hps.data.spk2id
+        if speaker is None:
+            return list(spk2id.values())[0]
+        if speaker in spk2id:
+            return spk2id[speaker]
+        raise KeyError(f'Unknown speaker {speaker!r}, expected one of {list(spk2id)}')
+
+    async def synthesize(self, text, speaker_id, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0):
+        """Yield (audio, word timings) chunks as tts_iter does."""
+        loop = asyncio.get_running_loop()
+        done = object()
+        # lookahead=0 keeps the text front-end on the inference thread too,
+        # g2p fills a module-level phoneme list that sessions must not share
+        chunks = self.tts.tts_iter(
+            text, speaker_id, sdp_ratio=sdp_ratio, noise_scale=noise_scale, noise_scale_w=noise_scale_w,
+            speed=speed, quiet=True, lookahead=0, chunk_frames=self.chunk_frames)
+        try:
+            while True:
+                chunk = await loop.run_in_executor(self.executor, next, chunks, done)
+                if chunk is done:
+                    break
+                yield chunk
+        finally:
+            # queued behind the step that may still be running
+            self.executor.submit(chunks.close)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _pcm16(audio):
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype('<i2').tobytes()
+
+
+def _parse_request(data):
+    # a bare text, or {"text": ..., "speaker": ..., "speed": ...}
+    if isinstance(data, str):
+        data = json.loads(data) if data.lstrip().startswith('{') else {'text': data}
+    params = {k: float(data[k]) for k in ['speed', 'sdp_ratio', 'noise_scale', 'noise_scale_w'] if k in data}
+    return data['text'], data.get('speaker'), params
+
+
+async def handle_http(request):
+    """POST /tts, the text or a JSON request as body: stream the audio
+    as raw 16-bit PCM (audio/L16)."""
+    service = request.app['service']
+    try:
+        text, speaker, params = _parse_request(await request.text())
+        speaker_id = service.speaker_id(speaker)
+    except (ValueError, KeyError) as e:
+        raise web.HTTPBadRequest(text=str(e))
+    response = web.StreamResponse(headers={'Content-Type': f'audio/L16; rate={service.sr}; channels=1'})
+    await response.prepare(request)
+    # aclosing stops the inference as soon as a write to a gone client fails
+    async with contextlib.aclosing(service.synthesize(text, speaker_id, **params)) as chunks:
+        async for audio, _ in chunks:
+            await response.write(_pcm16(audio))
+    await response.write_eof()
+    return response
+
+
+async def _stream_ws(ws, service, data, previous=None):
+    if previous is not None:
+        # one text at a time per connection, in the order they arrived
+        await previous
+    try:
+        text, speaker, params = _parse_request(data)
+        speaker_id = service.speaker_id(speaker)
+    except (ValueError, KeyError) as e:
+        await ws.send_str(json.dumps({'error': str(e)}))
+        return
+    async with contextlib.aclosing(service.synthesize(text, speaker_id, **params)) as chunks:
+        async for audio, word_dur in chunks:
+            # only the first chunk of a sentence carries timings
+            if word_dur:
+                await ws.send_str(json.dumps(word_dur))
+            await ws.send_bytes(_pcm16(audio))
+    await ws.send_str('EOF')
+
+
+async def handle_ws(request):
+    """/audiows: same protocol as melo/ws.py, text in, then timings as
+    JSON, 16-bit PCM binary messages and 'EOF' per text."""
+    service = request.app['service']
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+    task = None
+    try:
+        async for msg in ws:
+            if msg.type == WSMsgType.TEXT:
+                task = asyncio.create_task(_stream_ws(ws, service, msg.data, previous=task))
+    finally:
+        # the client is gone, drop whatever it still had queued
+        if task is not None:
+            task.cancel()
+    return ws
+
+
+def create_app(tts, chunk_frames=32):
+    service = AsyncTTS(tts, chunk_frames=chunk_frames)
+    app = web.Application()
+    app['service'] = service
+    app.router.add_post('/tts', handle_http)
+    app.router.add_get('/audiows', handle_ws)
+
+    async def on_cleanup(app):
+        service.close()
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+@click.command
+@click.option('--language', '-l', default='EN', help='Language, defaults to English', type=click.Choice(['EN', 'ES', 'FR', 'ZH', 'JP', 'KR'], case_sensitive=False))
+@click.option('--device', '-d', default='auto', help='Device, defaults to auto')
+@click.option('--host', default='0.0.0.0', help='Address to listen on')
+@click.option('--port', '-p', default=9009, help='Port to listen on', type=int)
+@click.option('--chunk-frames', default=32, help='Latent frames vocoded per streamed chunk', type=int)
+def main(language, device, host, port, chunk_frames):
+    from .api import TTS
+    tts = TTS(language=language.upper(), device=device)
+    web.run_app(create_app(tts, chunk_frames=chunk_frames), host=host, port=port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,8 @@
+import torch
+
 from .symbols import *
+from .cache import LRUCache, TensorStore
+from .bert_utils import word2ph_to_phone_level
 
 
 _symbol_to_id = {s: i for i, s in enumerate(symbols)}
@@ -20,16 +24,80 @@ def cleaned_text_to_sequence(cleaned_text, tones, language, symbol_to_id=None):
     return phones, tones, lang_ids
 
 
+# (model_id, norm_text) -> token-level BERT hidden states, bounded in bytes
+bert_cache = LRUCache(max_size=256 << 20, sizeof=lambda t: t.numel() * t.element_size())
+
+
+def set_bert_cache(max_bytes=256 << 20, path=None):
+    """Replace the BERT feature cache, optionally backed by a directory of
+    memory-mapped .npy files at `path`."""
+    global bert_cache
+    bert_cache.close()
+    bert_cache = LRUCache(
+        max_size=max_bytes,
+        sizeof=lambda t: t.numel() * t.element_size(),
+        store=TensorStore(path) if path else None,
+    )
+    return bert_cache
+
+
+def _bert_backend(language):
+    """Returns (module, model_id, kwargs) for the BERT used by a language."""
+    if language == "EN":
+        from . import english_bert as module
+        return module, module.model_id, {}
+    if language == "ZH":
+        from . import chinese_bert as module
+        return module, 'hfl/chinese-roberta-wwm-ext-large', {'model_id': 'hfl/chinese-roberta-wwm-ext-large'}
+    if language == "ZH_MIX_EN":
+        from . import chinese_bert as module
+        from .chinese_mix import model_id
+        return module, model_id, {'model_id': model_id}
+    if language == "JP":
+        from . import japanese_bert as module
+        return module, 'tohoku-nlp/bert-base-japanese-v3', {'model_id': 'tohoku-nlp/bert-base-japanese-v3'}
+    if language == "KR":
+        from . import japanese_bert as module
+        from .korean import model_id
+        return module, model_id, {'model_id': model_id}
+    if language == "FR":
+        from . import french_bert as module
+        return module, module.model_id, {}
+    if language in ["SP", "ES"]:
+        from . import spanish_bert as module
+        return module, module.model_id, {}
+    raise KeyError(language)
+
+
 def get_bert(norm_text, word2ph, language, device):
-    from .chinese_bert import get_bert_feature as zh_bert
-    from .english_bert import get_bert_feature as en_bert
-    from .japanese_bert import get_bert_feature as jp_bert
-    from .chinese_mix import get_bert_feature as zh_mix_en_bert
-    from .spanish_bert import get_bert_feature as sp_bert
-    from .french_bert import get_bert_feature as fr_bert
-    from .korean import get_bert_feature as kr_bert
-
-    lang_bert_func_map = {"ZH": zh_bert, "EN": en_bert, "JP": jp_bert, 'ZH_MIX_EN': zh_mix_en_bert, 
-                          'FR': fr_bert, 'SP': sp_bert, 'ES': sp_bert, "KR": kr_bert}
-    bert = lang_bert_func_map[language](norm_text, word2ph, device)
+    module, model_id, kwargs = _bert_backend(language)
+    hidden_states = bert_cache.get_or_compute(
+        (model_id, norm_text),
+        lambda: module.get_bert_hidden_states(norm_text, device, **kwargs),
+    )
+    bert = module.get_bert_feature(norm_text, word2ph, device, hidden_states=hidden_states, **kwargs)
     return bert
+
+
+def get_bert_batch(norm_texts, word2phs, language, device):
+    """get_bert for several sentences; those not in bert_cache go through
+    BERT together in one padded forward pass."""
+    module, model_id, kwargs = _bert_backend(language)
+    hidden_states = [bert_cache.get((model_id, t)) for t in norm_texts]
+    missing = [i for i, h in enumerate(hidden_states) if h is None]
+    if missing:
+        computed = module.get_bert_hidden_states_batch([norm_texts[i] for i in missing], device, **kwargs)
+        for i, h in zip(missing, computed):
+            bert_cache.put((model_id, norm_texts[i]), h)
+            hidden_states[i] = h
+
+    # expand every sentence with one repeat_interleave, then split them apart
+    for i, word2ph in enumerate(word2phs):
+        if language in ["ZH", "ZH_MIX_EN"]:
+            # like chinese_bert.get_bert_feature, only the leading len(word2ph) tokens are used
+            hidden_states[i] = hidden_states[i][:len(word2ph)]
+        assert hidden_states[i].shape[0] == len(word2ph), f"{hidden_states[i].shape[0]}/{len(word2ph)}"
+    phone_level_feature = word2ph_to_phone_level(
+        torch.cat(hidden_states, dim=0), [n for word2ph in word2phs for n in word2ph]
+    )
+    return [f.T for f in phone_level_feature.split([sum(word2ph) for word2ph in word2phs], dim=0)]
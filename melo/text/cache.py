@@ -0,0 +1,123 @@
+import os
+import shelve
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import torch
+
+_MISSING = object()
+
+
+class LRUCache(object):
+    """Thread-safe LRU mapping with hit/miss counters.
+
+    max_size bounds the sum of sizeof(value) over all entries (one per entry
+    by default). If `path` is given, entries are also written to a shelve
+    file there, or to `store` if one is passed, and looked up on a memory
+    miss so the cache survives restarts.
+    """
+
+    def __init__(self, max_size=4096, path=None, sizeof=None, store=None):
+        self.max_size = max_size
+        self.path = path
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self._size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        if store is None and path:
+            store = shelve.open(path)
+        self._disk = store
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            if self._disk is not None:
+                value = self._disk.get(repr(key), _MISSING)
+                if value is not _MISSING:
+                    self._put(key, value)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._put(key, value)
+            if self._disk is not None:
+                self._disk[repr(key)] = value
+
+    def get_or_compute(self, key, fn):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = fn()
+            self.put(key, value)
+        return value
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._data),
+                'size': self._size, 'max_size': self.max_size}
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+            self.hits = self.misses = 0
+
+    def close(self):
+        with self._lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
+
+    def _sizeof(self, value):
+        return self.sizeof(value) if self.sizeof else 1
+
+    def _put(self, key, value):
+        if key in self._data:
+            self._size -= self._sizeof(self._data.pop(key))
+        self._data[key] = value
+        self._size += self._sizeof(value)
+        while self._size > self.max_size and self._data:
+            _, old = self._data.popitem(last=False)
+            self._size -= self._sizeof(old)
+
+
+class TensorStore(object):
+    """Directory of .npy files, one per key, memory-mapped on read.
+
+    Used as the persistent tier of an LRUCache holding tensors; pages are
+    only read from disk when the returned tensor is actually touched.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.npy')
+
+    def get(self, key, default=None):
+        fname = self._file(key)
+        if not os.path.exists(fname):
+            return default
+        return torch.from_numpy(np.load(fname, mmap_mode='c'))
+
+    def __setitem__(self, key, value):
+        fname = self._file(key)
+        tmp = fname + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.save(f, value.detach().cpu().numpy())
+        os.replace(tmp, fname)
+
+    def close(self):
+        pass
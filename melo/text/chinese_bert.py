@@ -1,6 +1,7 @@
 import torch
 import sys
 from transformers import AutoTokenizer, AutoModelForMaskedLM
+from .bert_utils import word2ph_to_phone_level
 
 
 # model_id = 'hfl/chinese-roberta-wwm-ext-large'
@@ -10,7 +11,13 @@ local_path = "./bert/chinese-roberta-wwm-ext-large"
 tokenizers = {}
 models = {}
 
-def get_bert_feature(text, word2ph, device=None, model_id='hfl/chinese-roberta-wwm-ext-large'):
+def get_bert_hidden_states(text, device=None, model_id='hfl/chinese-roberta-wwm-ext-large'):
+    """Token-level features of `text`, before the word2ph expansion."""
+    return get_bert_hidden_states_batch([text], device, model_id=model_id)[0]
+
+
+def get_bert_hidden_states_batch(texts, device=None, model_id='hfl/chinese-roberta-wwm-ext-large'):
+    """get_bert_hidden_states for several texts in one padded forward pass."""
     if model_id not in models:
         models[model_id] = AutoModelForMaskedLM.from_pretrained(
             model_id
@@ -29,20 +36,22 @@ def get_bert_feature(text, word2ph, device=None, model_id='hfl/chinese-roberta-w
         device = "cuda"
 
     with torch.no_grad():
-        inputs = tokenizer(text, return_tensors="pt")
+        inputs = tokenizer(texts, padding=True, return_tensors="pt")
+        lengths = inputs["attention_mask"].sum(-1).tolist()
         for i in inputs:
             inputs[i] = inputs[i].to(device)
         res = model(**inputs, output_hidden_states=True)
-        res = torch.cat(res["hidden_states"][-3:-2], -1)[0].cpu()
+        res = torch.cat(res["hidden_states"][-3:-2], -1).cpu()
+    return [res[i, :n].clone() for i, n in enumerate(lengths)]
+
+
+def get_bert_feature(text, word2ph, device=None, model_id='hfl/chinese-roberta-wwm-ext-large', hidden_states=None):
+    res = hidden_states
+    if res is None:
+        res = get_bert_hidden_states(text, device, model_id=model_id)
     # import pdb; pdb.set_trace()
     # assert len(word2ph) == len(text) + 2
-    word2phone = word2ph
-    phone_level_feature = []
-    for i in range(len(word2phone)):
-        repeat_feature = res[i].repeat(word2phone[i], 1)
-        phone_level_feature.append(repeat_feature)
-
-    phone_level_feature = torch.cat(phone_level_feature, dim=0)
+    phone_level_feature = word2ph_to_phone_level(res, word2ph)
     return phone_level_feature.T
 
 
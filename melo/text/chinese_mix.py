@@ -7,7 +7,7 @@ from pypinyin import lazy_pinyin, Style
 # from text.symbols import punctuation
 from .symbols import language_tone_start_map
 from .tone_sandhi import ToneSandhi
-from .english import g2p as g2p_en
+from .english import g2p as g2p_en, get_phoneme_list
 from transformers import AutoTokenizer
 
 punctuation = ["!", "?", "…", ",", ".", "'", "-"]
@@ -66,7 +66,10 @@ def replace_punctuation(text):
     return replaced_text
 
 
-def g2p(text, impl='v2'):
+def g2p(text, impl='v2', phoneme_list=None):
+    # phoneme_list collects the info of the english words, as in english.g2p
+    if phoneme_list is None:
+        phoneme_list = get_phoneme_list()
     pattern = r"(?<=[{0}])\s*".format("".join(punctuation))
     sentences = [i for i in re.split(pattern, text) if i.strip() != ""]
     if impl == 'v1':
@@ -75,7 +78,7 @@ def g2p(text, impl='v2'):
         _func = _g2p_v2
     else:
         raise NotImplementedError()
-    phones, tones, word2ph = _func(sentences)
+    phones, tones, word2ph = _func(sentences, phoneme_list)
     assert sum(word2ph) == len(phones)
     # assert len(word2ph) == len(text)  # Sometimes it will crash,you can add a try-catch.
     phones = ["_"] + phones + ["_"]
@@ -98,7 +101,9 @@ def _get_initials_finals(word):
 
 model_id = 'bert-base-multilingual-uncased'
 tokenizer = AutoTokenizer.from_pretrained(model_id)
-def _g2p(segments):
+def _g2p(segments, phoneme_list=None):
+    if phoneme_list is None:
+        phoneme_list = get_phoneme_list()
     phones_list = []
     tones_list = []
     word2ph = []
@@ -126,7 +131,7 @@ def _g2p(segments):
         for c, v in zip(initials, finals):
             if c == 'EN_WORD':
                 tokenized_en = tokenizer.tokenize(v)
-                phones_en, tones_en, word2ph_en = g2p_en(text=None, pad_start_end=False, tokenized=tokenized_en)
+                phones_en, tones_en, word2ph_en = g2p_en(text=None, pad_start_end=False, tokenized=tokenized_en, phoneme_list=phoneme_list)
                 # apply offset to tones_en
                 tones_en = [t + language_tone_start_map['EN'] for t in tones_en]
                 phones_list += phones_en
@@ -199,7 +204,9 @@ def get_bert_feature(text, word2ph, device):
     return chinese_bert.get_bert_feature(text, word2ph, model_id='bert-base-multilingual-uncased', device=device)
 
 from .chinese import _g2p as _chinese_g2p
-def _g2p_v2(segments):
+def _g2p_v2(segments, phoneme_list=None):
+    if phoneme_list is None:
+        phoneme_list = get_phoneme_list()
     spliter = '#$&^!@'
 
     phones_list = []
@@ -218,7 +225,7 @@ def _g2p_v2(segments):
             if re.match('[a-zA-Z\s]+', text):
                 # english
                 tokenized_en = tokenizer.tokenize(text)
-                phones_en, tones_en, word2ph_en = g2p_en(text=None, pad_start_end=False, tokenized=tokenized_en)
+                phones_en, tones_en, word2ph_en = g2p_en(text=None, pad_start_end=False, tokenized=tokenized_en, phoneme_list=phoneme_list)
                 # apply offset to tones_en
                 tones_en = [t + language_tone_start_map['EN'] for t in tones_en]
                 phones_list += phones_en
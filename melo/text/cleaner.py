@@ -1,15 +1,51 @@
-from . import chinese, japanese, english, chinese_mix, korean, french, spanish
 from . import cleaned_text_to_sequence
+from .cache import LRUCache
+from collections.abc import Mapping
+import importlib
 import copy
 
-language_module_map = {"ZH": chinese, "JP": japanese, "EN": english, 'ZH_MIX_EN': chinese_mix, 'KR': korean,
-                    'FR': french, 'SP': spanish, 'ES': spanish}
 
+class LazyModuleMap(Mapping):
+    """language -> front-end module, imported on first lookup.
 
-def clean_text(text, language):
+    Importing a language module loads its tokenizer, dictionaries and
+    taggers, so only the languages actually used pay for it.
+    """
+
+    def __init__(self, names):
+        self.names = names
+
+    def __getitem__(self, language):
+        return importlib.import_module('.' + self.names[language], __package__)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+
+language_module_map = LazyModuleMap({"ZH": 'chinese', "JP": 'japanese', "EN": 'english', 'ZH_MIX_EN': 'chinese_mix', 'KR': 'korean',
+                    'FR': 'french', 'SP': 'spanish', 'ES': 'spanish'})
+
+
+def preload(languages):
+    """Import the front-end and BERT modules of `languages` ahead of the first request."""
+    from . import _bert_backend
+    for language in languages:
+        language_module_map[language]
+        _bert_backend(language)
+
+
+def clean_text(text, language, phoneme_list=None):
+    # phoneme_list: for EN / ZH_MIX_EN, collect the per-phoneme info there
+    # instead of english's module-level list
     language_module = language_module_map[language]
     norm_text = language_module.text_normalize(text)
-    phones, tones, word2ph = language_module.g2p(norm_text)
+    if phoneme_list is None:
+        phones, tones, word2ph = language_module.g2p(norm_text)
+    else:
+        phones, tones, word2ph = language_module.g2p(norm_text, phoneme_list=phoneme_list)
     print("PHONES", len(phones))
     print(" TONES", len(tones))
     print("PHONES", phones)
@@ -17,6 +53,33 @@ def clean_text(text, language):
     return norm_text, phones, tones, word2ph
 
 
+# (language, text) -> (norm_text, phones, tones, word2ph, phoneme_list)
+g2p_cache = LRUCache(max_size=4096)
+
+
+def set_g2p_cache(max_size=4096, path=None):
+    """Replace the G2P result cache, optionally backed by a file at `path`."""
+    global g2p_cache
+    g2p_cache.close()
+    g2p_cache = LRUCache(max_size=max_size, path=path)
+    return g2p_cache
+
+
+def clean_text_cached(text, language):
+    """clean_text through g2p_cache; callers get fresh lists they may modify."""
+    def compute():
+        # a list of its own, callers may run the front-end concurrently
+        phoneme_list = [None] if language in ['EN', 'ZH_MIX_EN'] else None
+        norm_text, phones, tones, word2ph = clean_text(text, language, phoneme_list=phoneme_list)
+        return norm_text, tuple(phones), tuple(tones), tuple(word2ph), phoneme_list
+
+    norm_text, phones, tones, word2ph, phoneme_list = g2p_cache.get_or_compute((language, text), compute)
+    if phoneme_list is not None:
+        # english.g2p reports per-phoneme info through a module-level list
+        language_module_map['EN'].get_phoneme_list()[:] = copy.deepcopy(phoneme_list)
+    return norm_text, list(phones), list(tones), list(word2ph)
+
+
 def clean_text_bert(text, language, device=None):
     language_module = language_module_map[language]
     norm_text = language_module.text_normalize(text)
@@ -4,6 +4,7 @@ import re
 from g2p_en import G2p
 
 from . import symbols
+from .cache import LRUCache
 
 from .english_utils.abbreviations import expand_abbreviations
 from .english_utils.time_norm import expand_time_english
@@ -218,6 +219,43 @@ def g2p_old(text):
     phones = [post_replace_ph(i) for i in phones]
     return phones, tones, word2ph
 
+# word -> (phones, tones), shared by all threads
+word_cache = LRUCache(max_size=65536)
+
+
+def word_to_phonemes(w):
+    """Phones and tones for one word from the CMU dict, falling back to
+    g2p_en for OOV words. Results are memoized in word_cache."""
+    def compute():
+        if w.upper() in eng_dict:
+            phns, tns = refine_syllables(eng_dict[w.upper()])
+            return tuple(phns), tuple(tns)
+        phns, tns = [], []
+        for ph in _g2p(w):
+            if ph == " ":
+                continue
+            if ph in arpa:
+                ph, tn = refine_ph(ph)
+            else:
+                tn = 0
+            phns.append(ph)
+            tns.append(tn)
+        return tuple(phns), tuple(tns)
+
+    phns, tns = word_cache.get_or_compute(w, compute)
+    return list(phns), list(tns)
+
+
+def preload_words(words):
+    """Warm word_cache from an iterable of words or a word-list file, one per line."""
+    if isinstance(words, str):
+        with open(words) as f:
+            words = [line.strip() for line in f]
+    for w in words:
+        if w:
+            word_to_phonemes(w.lower())
+    return word_cache.stats()
+
 PHONEME_LIST = [None]
 
 def get_phoneme_list():
@@ -266,28 +304,14 @@ def g2p(text, pad_start_end=True, tokenized=None, phoneme_list=PHONEME_LIST):
             continue
         phone_len = 0
         word_len = len(group)
-        if w.upper() in eng_dict:
-            phns, tns = refine_syllables(eng_dict[w.upper()])
-            for n, (ph, tn) in enumerate(zip(phns, tns)):
-                word = w if n == 0 else None
-                phoneme_list.append(dict(phoneme=ph, tone=tn, word=word, tag_count=tag_count))
-                tag_count = 0
-            phones += phns
-            tones += tns
-            phone_len += len(phns)
-        else:
-            phone_list = list(filter(lambda p: p != " ", _g2p(w)))
-            for n, ph in enumerate(phone_list):
-                if ph in arpa:
-                    ph, tn = refine_ph(ph)
-                else:
-                    tn = 0
-                phones.append(ph)
-                tones.append(tn)
-                word = w if n == 0 else None
-                phoneme_list.append(dict(phoneme=ph, tone=tn, word=word, tag_count=tag_count))
-                tag_count = 0
-                phone_len += 1
+        phns, tns = word_to_phonemes(w)
+        for n, (ph, tn) in enumerate(zip(phns, tns)):
+            word = w if n == 0 else None
+            phoneme_list.append(dict(phoneme=ph, tone=tn, word=word, tag_count=tag_count))
+            tag_count = 0
+        phones += phns
+        tones += tns
+        phone_len += len(phns)
         aaa = distribute_phone(phone_len, word_len)
         word2ph += aaa
     phones = [post_replace_ph(i) for i in phones]
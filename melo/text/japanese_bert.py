@@ -1,11 +1,18 @@
 import torch
 from transformers import AutoTokenizer, AutoModelForMaskedLM
+from .bert_utils import word2ph_to_phone_level
 import sys
 
 
 models = {}
 tokenizers = {}
-def get_bert_feature(text, word2ph, device=None, model_id='tohoku-nlp/bert-base-japanese-v3'):
+def get_bert_hidden_states(text, device=None, model_id='tohoku-nlp/bert-base-japanese-v3'):
+    """Token-level features of `text`, before the word2ph expansion."""
+    return get_bert_hidden_states_batch([text], device, model_id=model_id)[0]
+
+
+def get_bert_hidden_states_batch(texts, device=None, model_id='tohoku-nlp/bert-base-japanese-v3'):
+    """get_bert_hidden_states for several texts in one padded forward pass."""
     global model
     global tokenizer
 
@@ -30,20 +37,21 @@ def get_bert_feature(text, word2ph, device=None, model_id='tohoku-nlp/bert-base-
 
 
     with torch.no_grad():
-        inputs = tokenizer(text, return_tensors="pt")
-        tokenized = tokenizer.tokenize(text)
+        inputs = tokenizer(texts, padding=True, return_tensors="pt")
+        lengths = inputs["attention_mask"].sum(-1).tolist()
         for i in inputs:
             inputs[i] = inputs[i].to(device)
         res = model(**inputs, output_hidden_states=True)
-        res = torch.cat(res["hidden_states"][-3:-2], -1)[0].cpu()
+        res = torch.cat(res["hidden_states"][-3:-2], -1).cpu()
+    return [res[i, :n].clone() for i, n in enumerate(lengths)]
+
 
-    assert inputs["input_ids"].shape[-1] == len(word2ph), f"{inputs['input_ids'].shape[-1]}/{len(word2ph)}"
-    word2phone = word2ph
-    phone_level_feature = []
-    for i in range(len(word2phone)):
-        repeat_feature = res[i].repeat(word2phone[i], 1)
-        phone_level_feature.append(repeat_feature)
+def get_bert_feature(text, word2ph, device=None, model_id='tohoku-nlp/bert-base-japanese-v3', hidden_states=None):
+    res = hidden_states
+    if res is None:
+        res = get_bert_hidden_states(text, device, model_id=model_id)
 
-    phone_level_feature = torch.cat(phone_level_feature, dim=0)
+    assert res.shape[0] == len(word2ph), f"{res.shape[0]}/{len(word2ph)}"
+    phone_level_feature = word2ph_to_phone_level(res, word2ph)
 
     return phone_level_feature.T
@@ -1,12 +1,19 @@
 import torch
 from transformers import AutoTokenizer, AutoModelForMaskedLM
+from .bert_utils import word2ph_to_phone_level
 import sys
 
 model_id = 'dccuchile/bert-base-spanish-wwm-uncased'
 tokenizer = AutoTokenizer.from_pretrained(model_id)
 model = None
 
-def get_bert_feature(text, word2ph, device=None):
+def get_bert_hidden_states(text, device=None):
+    """Token-level features of `text`, before the word2ph expansion."""
+    return get_bert_hidden_states_batch([text], device)[0]
+
+
+def get_bert_hidden_states_batch(texts, device=None):
+    """get_bert_hidden_states for several texts in one padded forward pass."""
     global model
     if (
         sys.platform == "darwin"
@@ -21,19 +28,21 @@ def get_bert_feature(text, word2ph, device=None):
             device
         )
     with torch.no_grad():
-        inputs = tokenizer(text, return_tensors="pt")
+        inputs = tokenizer(texts, padding=True, return_tensors="pt")
+        lengths = inputs["attention_mask"].sum(-1).tolist()
         for i in inputs:
             inputs[i] = inputs[i].to(device)
         res = model(**inputs, output_hidden_states=True)
-        res = torch.cat(res["hidden_states"][-3:-2], -1)[0].cpu()
-        
-    assert inputs["input_ids"].shape[-1] == len(word2ph)
-    word2phone = word2ph
-    phone_level_feature = []
-    for i in range(len(word2phone)):
-        repeat_feature = res[i].repeat(word2phone[i], 1)
-        phone_level_feature.append(repeat_feature)
-
-    phone_level_feature = torch.cat(phone_level_feature, dim=0)
+        res = torch.cat(res["hidden_states"][-3:-2], -1).cpu()
+    return [res[i, :n].clone() for i, n in enumerate(lengths)]
+
+
+def get_bert_feature(text, word2ph, device=None, hidden_states=None):
+    res = hidden_states
+    if res is None:
+        res = get_bert_hidden_states(text, device)
+
+    assert res.shape[0] == len(word2ph)
+    phone_level_feature = word2ph_to_phone_level(res, word2ph)
 
     return phone_level_feature.T
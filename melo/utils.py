@@ -9,8 +9,8 @@ from scipy.io.wavfile import read
 import torch
 import torchaudio
 import librosa
-from melo.text import cleaned_text_to_sequence, get_bert
-from melo.text.cleaner import clean_text
+from melo.text import cleaned_text_to_sequence, get_bert_batch
+from melo.text.cleaner import clean_text_cached
 from melo import commons
 
 MATPLOTLIB_FLAG = False
@@ -20,48 +20,96 @@ logger = logging.getLogger(__name__)
 
 
 def get_text_for_tts_infer(text, language_str, hps, device, symbol_to_id=None):
-    print("199999-1")
-    norm_text, phone, tone, word2ph = clean_text(text, language_str)
-    print("199999-2")
-    phone, tone, language = cleaned_text_to_sequence(phone, tone, language_str, symbol_to_id)
-    print("199999-3")
-
-    if hps.data.add_blank:
-        phone = commons.intersperse(phone, 0)
-        tone = commons.intersperse(tone, 0)
-        language = commons.intersperse(language, 0)
-        for i in range(len(word2ph)):
-            word2ph[i] = word2ph[i] * 2
-        word2ph[0] += 1
+    return get_text_for_tts_infer_batch([text], language_str, hps, device, symbol_to_id)[0]
+
+
+def get_text_for_tts_infer_batch(texts, language_str, hps, device, symbol_to_id=None):
+    """get_text_for_tts_infer for several sentences, sharing one BERT pass."""
+    items = []
+    for text in texts:
+        print("199999-1")
+        norm_text, phone, tone, word2ph = clean_text_cached(text, language_str)
+        print("199999-2")
+        phone, tone, language = cleaned_text_to_sequence(phone, tone, language_str, symbol_to_id)
+        print("199999-3")
+
+        if hps.data.add_blank:
+            phone = commons.intersperse(phone, 0)
+            tone = commons.intersperse(tone, 0)
+            language = commons.intersperse(language, 0)
+            for i in range(len(word2ph)):
+                word2ph[i] = word2ph[i] * 2
+            word2ph[0] += 1
+        items.append((norm_text, phone, tone, language, word2ph))
 
     if getattr(hps.data, "disable_bert", False):
-        bert = torch.zeros(1024, len(phone))
-        ja_bert = torch.zeros(768, len(phone))
+        berts = [None] * len(items)
     else:
         print("199999-4")
-        bert = get_bert(norm_text, word2ph, language_str, device)
+        berts = get_bert_batch([item[0] for item in items], [item[4] for item in items], language_str, device)
         print("199999-5")
-        del word2ph
-        assert bert.shape[-1] == len(phone), phone
-        print("199999-6")
 
-        if language_str == "ZH":
-            bert = bert
-            ja_bert = torch.zeros(768, len(phone))
-        elif language_str in ["JP", "EN", "ZH_MIX_EN", 'KR', 'SP', 'ES', 'FR', 'DE', 'RU']:
-            ja_bert = bert
+    results = []
+    for (norm_text, phone, tone, language, word2ph), bert in zip(items, berts):
+        if bert is None:
             bert = torch.zeros(1024, len(phone))
+            ja_bert = torch.zeros(768, len(phone))
         else:
-            raise NotImplementedError()
+            assert bert.shape[-1] == len(phone), phone
+            print("199999-6")
+
+            if language_str == "ZH":
+                bert = bert
+                ja_bert = torch.zeros(768, len(phone))
+            elif language_str in ["JP", "EN", "ZH_MIX_EN", 'KR', 'SP', 'ES', 'FR', 'DE', 'RU']:
+                ja_bert = bert
+                bert = torch.zeros(1024, len(phone))
+            else:
+                raise NotImplementedError()
+
+        assert bert.shape[-1] == len(
+            phone
+        ), f"Bert seq len {bert.shape[-1]} != {len(phone)}"
 
-    assert bert.shape[-1] == len(
-        phone
-    ), f"Bert seq len {bert.shape[-1]} != {len(phone)}"
+        phone = torch.LongTensor(phone)
+        tone = torch.LongTensor(tone)
+        language = torch.LongTensor(language)
+        results.append((bert, ja_bert, phone, tone, language))
+    return results
 
-    phone = torch.LongTensor(phone)
-    tone = torch.LongTensor(tone)
-    language = torch.LongTensor(language)
-    return bert, ja_bert, phone, tone, language
+
+def collate_text_for_tts_infer(features, device, buckets=None):
+    """Pad a list of get_text_for_tts_infer outputs into one batch.
+
+    Returns x, x_lengths, tones, lang_ids, bert, ja_bert ready for
+    SynthesizerTrn.infer. With buckets, the padded length is rounded up
+    with commons.bucket_length.
+    """
+    lengths = [phone.size(0) for _, _, phone, _, _ in features]
+    b, max_len = len(features), max(lengths)
+    if buckets:
+        max_len = commons.bucket_length(max_len, buckets)
+    x = torch.zeros(b, max_len, dtype=torch.long)
+    tones = torch.zeros(b, max_len, dtype=torch.long)
+    lang_ids = torch.zeros(b, max_len, dtype=torch.long)
+    bert = torch.zeros(b, features[0][0].size(0), max_len)
+    ja_bert = torch.zeros(b, features[0][1].size(0), max_len)
+    for i, (bt, jbt, phone, tone, language) in enumerate(features):
+        n = lengths[i]
+        x[i, :n] = phone
+        tones[i, :n] = tone
+        lang_ids[i, :n] = language
+        bert[i, :, :n] = bt
+        ja_bert[i, :, :n] = jbt
+    x_lengths = torch.LongTensor(lengths)
+    return (
+        x.to(device),
+        x_lengths.to(device),
+        tones.to(device),
+        lang_ids.to(device),
+        bert.to(device),
+        ja_bert.to(device),
+    )
 
 def load_checkpoint(checkpoint_path, model, optimizer=None, skip_optimizer=False):
     assert os.path.isfile(checkpoint_path)
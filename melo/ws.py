@@ -11,6 +11,8 @@ device = 'auto'
 tts = TTS(language='EN', device=device)
 speaker_id = tts.hps.data.spk2id[speaker]
 sr = tts.hps.data.sampling_rate
+# vocode in windows of this many latent frames so playback starts early
+chunk_frames = 32
 app = default_app()
 
 def sound_file(output):
@@ -44,7 +46,7 @@ def handle_audio():
             text = wsock.receive()
             print("GOT TEXT", text)
         
-            iter = tts.tts_iter(text, speaker_id)
+            iter = tts.tts_iter(text, speaker_id, chunk_frames=chunk_frames)
             print("GOT ITER", iter)
 
             buf = io.BytesIO()
@@ -70,7 +72,9 @@ def handle_audio():
                     print("PCM", type(pcm_bytes), len(pcm_bytes), pcm_bytes[:25])
                     
                     # write word_dur to buffer
-                    wsock.send( json.dumps(word_dur) )
+                    # (only the first chunk of a sentence carries timings)
+                    if word_dur:
+                        wsock.send( json.dumps(word_dur) )
 
                     wsock.send( pcm_bytes )
 
@@ -35,6 +35,9 @@ setup(
             "melotts = melo.main:main",
             "melo = melo.main:main",
             "melo-ui = melo.app:main",
+            "melo-convert = melo.convert:main",
+            "melo-batch = melo.batch:main",
+            "melo-server = melo.server:main",
         ],
     },
 )
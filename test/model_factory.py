@@ -0,0 +1,84 @@
+import os
+import torch
+
+from melo import utils
+from melo.models import SynthesizerTrn
+from melo.text.symbols import symbols, num_tones, num_languages
+
+# shared by the model tests: random weights are enough, the tests compare
+# a model against a transformed copy of itself
+hps = utils.get_hparams_from_file(os.path.join(os.path.dirname(__file__), '..', 'melo', 'configs', 'config.json'))
+
+# a narrow model with the released hop length
+# (the speaker-conditioned encoder needs n_layers > 2, the transformer flow exactly 3)
+TINY = dict(hps.model, inter_channels=32, hidden_channels=32, filter_channels=64, n_layers=3,
+            n_layers_trans_flow=3, upsample_initial_channel=32, gin_channels=16)
+
+
+def build(seed=0, tiny=True):
+    """A SynthesizerTrn in eval mode, TINY or the released config."""
+    torch.manual_seed(seed)
+    return SynthesizerTrn(
+        len(symbols),
+        hps.data.filter_length // 2 + 1,
+        hps.train.segment_size // hps.data.hop_length,
+        n_speakers=4 if tiny else hps.data.n_speakers,
+        num_tones=num_tones,
+        num_languages=num_languages,
+        **(TINY if tiny else hps.model),
+    ).eval()
+
+
+def copy_of(model, tiny=True):
+    # weight-normed modules don't deepcopy, so copy through the state dict
+    copy = build(tiny=tiny)
+    copy.load_state_dict(model.state_dict())
+    return copy
+
+
+def inputs(n, seed=0, sid=0):
+    """Random infer() inputs for one sentence of n phones."""
+    torch.manual_seed(seed)
+    x = torch.randint(1, len(symbols), (1, n))
+    tone = torch.randint(0, num_tones, (1, n))
+    language = torch.randint(0, num_languages, (1, n))
+    return x, torch.LongTensor([n]), torch.LongTensor([sid]), tone, language, torch.randn(1, 1024, n), torch.randn(1, 768, n)
+
+
+def synthesize(model, seed=0, n=32, sdp_ratio=0., noise_scale=0., noise_scale_w=0.):
+    """infer() waveform [1, 1, t]; the noise is drawn right after the
+    inputs, so equal seeds give equal noise."""
+    features = inputs(n, seed)
+    with torch.no_grad():
+        o, _, _, _ = model.infer(*features, sdp_ratio=sdp_ratio, noise_scale=noise_scale, noise_scale_w=noise_scale_w)
+    return o
+
+
+def tiny_tts(seed=0, device='cpu'):
+    """A TTS around build(seed) for the tests of the model-facing TTS paths
+    (infer_batch, compile_for_inference); its text front-end is not set up,
+    pass features to infer_batch directly."""
+    from melo.api import TTS
+    config = dict(hps.items())
+    config['data'] = dict(hps.data.items(), n_speakers=4, spk2id={'spk0': 0, 'spk1': 1})
+    config['model'] = TINY
+    config = {k: dict(v.items()) if isinstance(v, utils.HParams) else v for k, v in config.items()}
+    tts = TTS.__new__(TTS)
+    torch.nn.Module.__init__(tts)
+    tts.model = build(seed).to(device)
+    tts.backend = 'torch'
+    tts.hps = utils.HParams(**config)
+    tts.device = device
+    tts.precision = 'fp32'
+    tts.phone_buckets = None
+    tts.frame_buckets = None
+    tts.batch_buckets = None
+    tts.speaker_cache = {}
+    tts.language = 'EN'
+    return tts
+
+
+def features(n, seed=0):
+    """One text_to_features-like item of n phones."""
+    x, _, _, tone, language, bert, ja_bert = inputs(n, seed)
+    return bert[0], ja_bert[0], x[0], tone[0], language[0]
@@ -0,0 +1,52 @@
+import torch
+
+from melo.attentions import MultiHeadAttention, Encoder
+
+
+def compare(attn, x, mask, valid):
+    attn.eval()
+    with torch.no_grad():
+        attn.fast_path = False
+        ref = attn(x, x, mask)
+        attn.fast_path = True
+        out = attn(x, x, mask)
+    # padded query positions are not comparable, see _attention_fast
+    ref, out = ref * valid, out * valid
+    assert torch.allclose(ref, out, atol=1e-5), (ref - out).abs().max()
+
+
+def test_multi_head_attention():
+    torch.manual_seed(0)
+    lengths = torch.LongTensor([37, 20])
+    x_mask = (torch.arange(37).unsqueeze(0) < lengths.unsqueeze(1)).float().unsqueeze(1)
+    mask = x_mask.unsqueeze(2) * x_mask.unsqueeze(-1)
+    x = torch.randn(2, 192, 37) * x_mask
+    for kwargs in [
+        dict(window_size=4),
+        dict(window_size=4, heads_share=False),
+        dict(window_size=10),  # window longer than the short sentence
+        dict(),
+        dict(proximal_bias=True),
+    ]:
+        compare(MultiHeadAttention(192, 192, 2, **kwargs), x, mask, x_mask)
+
+
+def test_encoder():
+    torch.manual_seed(0)
+    x_mask = torch.ones(1, 1, 50)
+    x = torch.randn(1, 192, 50)
+    enc = Encoder(192, 768, 2, 6, 3).eval()
+    with torch.no_grad():
+        for layer in enc.attn_layers:
+            layer.fast_path = False
+        ref = enc(x, x_mask)
+        for layer in enc.attn_layers:
+            layer.fast_path = True
+        out = enc(x, x_mask)
+    assert torch.allclose(ref, out, atol=1e-4), (ref - out).abs().max()
+
+
+if __name__ == '__main__':
+    test_multi_head_attention()
+    test_encoder()
+    print('ok')
@@ -0,0 +1,21 @@
+import torch
+
+from model_factory import tiny_tts, features
+
+
+def test_no_recompile_after_warmup():
+    tts = tiny_tts().compile_for_inference()
+    # anything past warmup that still needs a graph is an error
+    torch._dynamo.config.error_on_recompile = True
+    try:
+        for batch_size in [1, 3, 8]:
+            for n in [5, 40, 100]:
+                audios = tts.infer_batch([features(n, seed) for seed in range(batch_size)], 0)
+                assert len(audios) == batch_size
+    finally:
+        torch._dynamo.config.error_on_recompile = False
+
+
+if __name__ == '__main__':
+    test_no_recompile_after_warmup()
+    print('ok')
@@ -0,0 +1,35 @@
+import torch
+
+from melo import commons
+
+
+def expand_with_path(duration, x_mask, y_mask, x):
+    # what SynthesizerTrn.infer did before expand_by_duration
+    attn_mask = torch.unsqueeze(x_mask, 2) * torch.unsqueeze(y_mask, -1)
+    attn = commons.generate_path(duration, attn_mask)
+    return torch.matmul(attn.squeeze(1), x.transpose(1, 2)).transpose(1, 2)
+
+
+def test_expand_by_duration_matches_generate_path():
+    torch.manual_seed(0)
+    t_x = 9
+    # padded rows: shorter sentences, and one whose durations are all 0
+    x_lengths = torch.LongTensor([9, 5, 2])
+    x_mask = commons.sequence_mask(x_lengths, t_x).unsqueeze(1).float()
+    duration = torch.randint(0, 5, (3, 1, t_x)).float() * x_mask
+    duration[2] = 0
+    y_lengths = torch.clamp_min(duration.sum([1, 2]), 1).long()
+    # a frame axis padded past the longest sentence, as with frame buckets
+    t_y = int(y_lengths.max()) + 7
+    y_mask = commons.sequence_mask(y_lengths, t_y).unsqueeze(1).float()
+    m_p = torch.randn(3, 4, t_x)
+    logs_p = torch.randn(3, 4, t_x)
+
+    out_m, out_logs = commons.expand_by_duration(duration, y_mask, m_p, logs_p)
+    assert torch.equal(out_m, expand_with_path(duration, x_mask, y_mask, m_p))
+    assert torch.equal(out_logs, expand_with_path(duration, x_mask, y_mask, logs_p))
+
+
+if __name__ == '__main__':
+    test_expand_by_duration_matches_generate_path()
+    print('ok')
@@ -0,0 +1,21 @@
+import torch
+
+from model_factory import build
+
+
+def test_stream_matches_forward():
+    dec = build().dec
+    torch.manual_seed(0)
+    z = torch.randn(1, dec.conv_pre.in_channels, 150)
+    g = torch.randn(1, dec.cond.in_channels, 1)
+    with torch.no_grad():
+        full = dec(z, g=g)
+        for chunk_frames in [1, 32, 64, 200]:
+            streamed = torch.cat(list(dec.stream(z, g=g, chunk_frames=chunk_frames)), dim=2)
+            assert streamed.shape == full.shape, (chunk_frames, streamed.shape, full.shape)
+            assert torch.allclose(streamed, full, atol=1e-6), (chunk_frames, (streamed - full).abs().max())
+
+
+if __name__ == '__main__':
+    test_stream_matches_forward()
+    print('ok')
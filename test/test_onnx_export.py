@@ -0,0 +1,41 @@
+import tempfile
+import torch
+
+from melo.onnx_export import export_onnx, OnnxSynthesizer
+from model_factory import build, inputs
+
+
+def test_onnx_matches_torch():
+    model = build()
+    with tempfile.TemporaryDirectory() as output_dir:
+        # export optimizes the model in place, so compare against it afterwards
+        export_onnx(model, output_dir)
+        onnx_model = OnnxSynthesizer(output_dir)
+        # lengths on both sides of the 64 phone export example
+        for n in [12, 100]:
+            kwargs = dict(noise_scale=0., noise_scale_w=0., sdp_ratio=0., length_scale=1.)
+            with torch.no_grad():
+                ref, _, ref_mask, _ = model.infer(*inputs(n, sid=1), **kwargs)
+            out, _, out_mask, _ = onnx_model.infer(*inputs(n, sid=1), **kwargs)
+            assert torch.equal(ref_mask, out_mask), (ref_mask.sum(), out_mask.sum())
+            assert ref.shape == out.shape, (ref.shape, out.shape)
+            assert torch.allclose(ref, out, atol=1e-3), (n, (ref - out).abs().max())
+
+
+def test_onnx_noise_follows_torch_seed():
+    model = build()
+    with tempfile.TemporaryDirectory() as output_dir:
+        onnx_model = OnnxSynthesizer(export_onnx(model, output_dir))
+        outputs = []
+        for _ in range(2):
+            features = inputs(24)
+            torch.manual_seed(1234)
+            # sdp_ratio > 0: the duration predictor noise must follow the seed too
+            outputs.append(onnx_model.infer(*features, noise_scale=0.667, noise_scale_w=0.8, sdp_ratio=0.5)[0])
+        assert torch.equal(outputs[0], outputs[1])
+
+
+if __name__ == '__main__':
+    test_onnx_matches_torch()
+    test_onnx_noise_follows_torch_seed()
+    print('ok')
@@ -0,0 +1,24 @@
+import torch
+
+from model_factory import build, copy_of, synthesize as _synthesize
+
+
+def synthesize(model, seed=0):
+    # the folded model must reproduce the unfolded one, noise included
+    return _synthesize(model, seed, n=24, sdp_ratio=0.5, noise_scale=0.6, noise_scale_w=0.8)
+
+
+def test_optimize_for_inference():
+    model = build(tiny=False)
+    optimized = copy_of(model, tiny=False).optimize_for_inference()
+    assert not any(k.endswith('.weight_g') for k in optimized.state_dict())
+    for seed in range(3):
+        ref = synthesize(model, seed)
+        out = synthesize(optimized, seed)
+        assert ref.shape == out.shape, (ref.shape, out.shape)
+        assert torch.allclose(ref, out, atol=1e-4), (ref - out).abs().max()
+
+
+if __name__ == '__main__':
+    test_optimize_for_inference()
+    print('ok')
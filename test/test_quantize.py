@@ -0,0 +1,67 @@
+import torch
+
+from melo.quantize import mel_distance, check_mel_distance, quantize_int8, bf16_supported, PointwiseLinear, _is_pointwise
+from model_factory import hps, build, copy_of, synthesize as _synthesize
+
+
+def synthesize(model, seed=0):
+    return _synthesize(model, seed)[0, 0].numpy()
+
+
+def test_mel_distance_check():
+    reference = build(seed=0)
+    optimized = copy_of(reference).optimize_for_inference()
+    unrelated = build(seed=1)
+    ref = synthesize(reference)
+    same = mel_distance(ref, synthesize(optimized), hps)
+    other = mel_distance(ref, synthesize(unrelated), hps)
+    assert same < 1e-3, same
+    assert other > same, (same, other)
+    # folding weight norm passes, a different model fails
+    threshold = (same + other) / 2
+    check_mel_distance(same, threshold)
+    try:
+        check_mel_distance(other, threshold)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError(f'{other} passed the check at {threshold}')
+
+
+def test_quantize_int8():
+    reference = build(seed=0)
+    quantized = quantize_int8(copy_of(reference))
+    for name in ['enc_p', 'dp', 'flow', 'dec']:
+        module = getattr(quantized, name)
+        assert not any(_is_pointwise(m) for m in module.modules()), name
+    assert any(isinstance(m, PointwiseLinear) for m in quantized.enc_p.modules())
+    assert any(isinstance(m, PointwiseLinear) for m in quantized.flow.modules())
+    # the stochastic duration predictor stays in fp32
+    assert not any(isinstance(m, PointwiseLinear) for m in quantized.sdp.modules())
+
+    ref = synthesize(reference)
+    out = synthesize(quantized)
+    assert abs(len(out) - len(ref)) <= len(ref) // 10, (len(ref), len(out))
+    # much closer to its fp32 model than an unrelated model is
+    other = mel_distance(ref, synthesize(build(seed=1)), hps)
+    assert mel_distance(ref, out, hps) < other / 2, (mel_distance(ref, out, hps), other)
+
+
+def test_bf16_autocast():
+    if not bf16_supported('cpu'):
+        print('bf16 not supported on this cpu, skipping')
+        return
+    model = build(seed=0).optimize_for_inference()
+    ref = synthesize(model)
+    with torch.autocast('cpu', dtype=torch.bfloat16):
+        out = synthesize(model)
+    assert out.dtype == ref.dtype
+    other = mel_distance(ref, synthesize(build(seed=1)), hps)
+    assert mel_distance(ref, out, hps) < other / 2, (mel_distance(ref, out, hps), other)
+
+
+if __name__ == '__main__':
+    test_mel_distance_check()
+    test_quantize_int8()
+    test_bf16_autocast()
+    print('ok')